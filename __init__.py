@@ -0,0 +1,30 @@
+"""
+Natural Language Toolkit for Hindi. The components below are imported on first access, so that
+importing the package, or text_utils, doesn't load tensorflow, gensim or sentencepiece.
+"""
+import importlib
+
+_LAZY_ATTRIBUTES = {
+    'DevanagariNormalizer': 'HindiNLTK.normalization',
+    'normalize_corpus': 'HindiNLTK.normalization',
+    'Tokenizer': 'HindiNLTK.tokenizer',
+    'Transliterate': 'HindiNLTK.transliterate',
+    'AsyncTransliterate': 'HindiNLTK.transliterate',
+    'POSTagger': 'HindiNLTK.pos_tagging.pos_tagging',
+    'Vectorizer': 'HindiNLTK.vectors.vectors',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,71 @@
+import re
+from functools import lru_cache
+
+import HindiNLTK.utils as utils
+
+ZERO_WIDTH_NON_JOINER = 0x200c
+ZERO_WIDTH_JOINER = 0x200d
+
+# an akshara is a consonant cluster, the consonants joined by halantas (C N? H J?), ending with
+# a consonant which may carry a nukta and a vowel sign or a final halanta, or an independent vowel,
+# both followed by any number of modifiers (anusvara, chandrabindu, visarga, stress marks).
+# Every other character, a stray sign included, is an akshara by itself. The classes are:
+#   C consonant, V independent vowel, M vowel sign, H halanta, N nukta, D modifier,
+#   J zero width (non) joiner
+AKSHARA_GRAMMAR = r'(?:CN?HJ?)*CN?(?:M|HJ?)?D*|VN?D*|.'
+
+
+def _offset_class(offset):
+    if utils.is_consonant_offset(offset) or 0x58 <= offset <= 0x5f or 0x79 <= offset <= 0x7f:
+        # with the precomposed nukta consonants and the consonants added after the utils ranges
+        return 'C'
+    if utils.is_vowel_offset(offset) or offset in (0x60, 0x61) or 0x72 <= offset <= 0x77:
+        return 'V'
+    if utils.is_vowel_sign_offset(offset) or offset in (0x4e, 0x4f, 0x55, 0x56, 0x57, 0x62, 0x63):
+        return 'M'
+    if utils.is_halanta_offset(offset):
+        return 'H'
+    if utils.is_nukta_offset(offset):
+        return 'N'
+    if 0x00 <= offset <= 0x03 or 0x51 <= offset <= 0x54:
+        return 'D'
+    return None
+
+
+@lru_cache(maxsize=None)
+def _akshara_pattern(lang):
+    """
+    AKSHARA_GRAMMAR compiled into a regex over the characters of the script, each class letter
+    replaced by the set of the characters of that class, so that the regex engine runs the
+    state machine of the grammar directly on the text
+    """
+    start = utils.SCRIPT_RANGES[lang][0]
+    classes = {'J': [chr(ZERO_WIDTH_NON_JOINER), chr(ZERO_WIDTH_JOINER)]}
+    for offset in range(0x80):
+        char_class = _offset_class(offset)
+        if char_class is not None:
+            classes.setdefault(char_class, []).append(chr(start + offset))
+    char_sets = {char_class: '[' + ''.join(re.escape(c) for c in chars) + ']' for char_class, chars in classes.items()}
+    return re.compile(re.sub('[CVMHNDJ]', lambda mobj: char_sets[mobj.group()], AKSHARA_GRAMMAR), re.DOTALL)
+
+
+def akshara_spans(word, lang='hi'):
+    """
+    Returns the (start, end) offsets of the aksharas of word
+    """
+    return [mobj.span() for mobj in _akshara_pattern(lang).finditer(word)]
+
+
+def segment(word, lang='hi'):
+    """
+    Splits word into its aksharas, e.g. 'क्षत्रिय' into ['क्ष', 'त्रि', 'य']
+    """
+    return _akshara_pattern(lang).findall(word)
+
+
+def segment_batch(words, lang='hi'):
+    """
+    segment() for a list of words
+    """
+    findall = _akshara_pattern(lang).findall
+    return [findall(word) for word in words]
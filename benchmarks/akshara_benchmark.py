@@ -0,0 +1,90 @@
+"""
+Benchmark of the akshara segmenter against a per character state machine calling the utils
+predicates, as the segmentation was done before. Checks that both split random Devanagari text and
+the synthetic words the same way and reports the throughput in words/sec of segment() and segment_batch().
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.akshara_benchmark
+"""
+import random
+import time
+
+import HindiNLTK.utils as utils
+from HindiNLTK.akshara import segment, segment_batch
+from HindiNLTK.benchmarks.stemmer_benchmark import synthetic_words
+
+# the characters which may follow the state, and the state after them
+TRANSITIONS = {
+    'consonant': {'N': 'nukta', 'H': 'halanta', 'M': 'sign', 'D': 'modifier'},
+    'nukta': {'H': 'halanta', 'M': 'sign', 'D': 'modifier'},
+    'halanta': {'J': 'joiner', 'C': 'consonant', 'D': 'modifier'},
+    'joiner': {'C': 'consonant', 'D': 'modifier'},
+    'sign': {'D': 'modifier'},
+    'vowel': {'N': 'vowel_nukta', 'D': 'modifier'},
+    'vowel_nukta': {'D': 'modifier'},
+    'modifier': {'D': 'modifier'},
+    'other': {},
+}
+
+
+def _char_class(c):
+    o = utils.get_offset(c, 'hi')
+    if utils.is_consonant(c, 'hi') or 0x58 <= o <= 0x5f or 0x79 <= o <= 0x7f:
+        return 'C'
+    if utils.is_vowel(c, 'hi') or o in (0x60, 0x61) or 0x72 <= o <= 0x77:
+        return 'V'
+    if utils.is_vowel_sign(c, 'hi') or o in (0x4e, 0x4f, 0x55, 0x56, 0x57, 0x62, 0x63):
+        return 'M'
+    if utils.is_halanta(c, 'hi'):
+        return 'H'
+    if utils.is_nukta(c, 'hi'):
+        return 'N'
+    if 0x00 <= o <= 0x03 or 0x51 <= o <= 0x54:
+        return 'D'
+    if c in '‌‍':
+        return 'J'
+    return 'O'
+
+
+def _reference_segment(word):
+    aksharas = []
+    state = None
+    for c in word:
+        char_class = _char_class(c)
+        if state is not None and char_class in TRANSITIONS[state]:
+            state = TRANSITIONS[state][char_class]
+            aksharas[-1] += c
+        else:
+            state = {'C': 'consonant', 'V': 'vowel'}.get(char_class, 'other')
+            aksharas.append(c)
+    return aksharas
+
+
+def _random_text(n_chars, seed=0):
+    rng = random.Random(seed)
+    alphabet = [chr(c) for c in range(0x0900, 0x0980)] + ['‌', '‍', 'a', ' ', '1']
+    return ''.join(rng.choice(alphabet) for _ in range(n_chars))
+
+
+def _words_per_sec(fn, words):
+    start = time.perf_counter()
+    result = fn(words)
+    return result, len(words) / (time.perf_counter() - start)
+
+
+def main():
+    fuzz = [_random_text(12, seed) for seed in range(20000)]
+    assert [segment(word) for word in fuzz] == [_reference_segment(word) for word in fuzz]
+    assert segment_batch(fuzz) == [_reference_segment(word) for word in fuzz]
+
+    words = synthetic_words(200000)
+    before, before_rate = _words_per_sec(lambda w: [_reference_segment(word) for word in w], words)
+    for name, fn in (('segment', lambda w: [segment(word) for word in w]), ('segment_batch', segment_batch)):
+        after, after_rate = _words_per_sec(fn, words)
+        assert after == before
+        print('{:<14} before {:>12,.0f} words/s  after {:>12,.0f} words/s  x{:.1f}'.format(
+            name, before_rate, after_rate, after_rate / before_rate))
+
+
+if __name__ == '__main__':
+    main()
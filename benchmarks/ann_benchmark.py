@@ -0,0 +1,79 @@
+"""
+Benchmark of the IVF index of Vectorizer.get_most_similar(approximate=True) against the exact
+search, on a synthetic clustered matrix shaped like the fastText Hindi vectors. The matrix is
+written in the binary layout of convert_vectors() to a temporary model directory and opened by a
+Vectorizer, so that both searches are the ones of the shipped code. Reports recall@10 and the
+latency per query for several n_probe.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.ann_benchmark
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from HindiNLTK import resources
+from HindiNLTK.vectors.vectors import MATRIX_PATH, SCALES_PATH, VOCAB_PATH, Vectorizer
+
+
+def synthetic_vectors(n_rows=158016, dim=300, n_topics=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(n_topics, size=n_rows)]
+    vectors += 1.2 * rng.standard_normal((n_rows, dim)).astype(np.float32)
+    return vectors
+
+
+def write_vectors(model_dir, words, matrix, scales=None):
+    """
+    Writes the files convert_vectors() would for matrix into model_dir
+    """
+    os.makedirs(os.path.join(model_dir, os.path.dirname(MATRIX_PATH)), exist_ok=True)
+    np.save(os.path.join(model_dir, MATRIX_PATH), matrix)
+    if scales is not None:
+        np.save(os.path.join(model_dir, SCALES_PATH), scales)
+    with open(os.path.join(model_dir, VOCAB_PATH), 'w', encoding='utf-8', newline='\n') as out_file:
+        for word in words:
+            out_file.write(word + '\n')
+
+
+def _time_queries(search, queries):
+    start = time.perf_counter()
+    found = [{word for word, _ in search(query)} for query in queries]
+    return found, (time.perf_counter() - start) / len(queries)
+
+
+def main(n_queries=200, topn=10):
+    vectors = synthetic_vectors()
+    words = ['w{}'.format(i) for i in range(len(vectors))]
+    queries = [words[i] for i in np.random.default_rng(1).choice(len(vectors), size=n_queries, replace=False)]
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        write_vectors(model_dir, words, vectors)
+        resources.set_model_dir(model_dir)
+        resources.release('vectors')
+        try:
+            vectorizer = Vectorizer()
+            start = time.perf_counter()
+            vectorizer.build_ann_index()
+            print('built the index over {} rows in {:.1f} s'.format(len(vectors), time.perf_counter() - start))
+
+            exact, exact_latency = _time_queries(lambda query: vectorizer.get_most_similar(query, topn=topn),
+                                                 queries)
+            print('exact          {:7.2f} ms/query'.format(exact_latency * 1000))
+
+            for n_probe in (1, 4, 16, 64):
+                found, latency = _time_queries(lambda query: vectorizer.get_most_similar(
+                    query, topn=topn, approximate=True, n_probe=n_probe), queries)
+                recall = np.mean([len(a & b) / topn for a, b in zip(exact, found)])
+                print('n_probe {:>4}   {:7.2f} ms/query  recall@{} {:.3f}  x{:.1f}'.format(
+                    n_probe, latency * 1000, topn, recall, exact_latency / latency))
+        finally:
+            resources.release('vectors')
+            resources.set_model_dir(None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark of the char_features tables against the per character utils predicates. Checks that the
+flags agree with every predicate for every codepoint of the Basic Multilingual Plane, then reports
+the throughput in chars/sec of one predicate and of all of them over a list of words.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.char_features_benchmark
+"""
+import time
+
+import numpy as np
+
+import HindiNLTK.char_features as char_features
+import HindiNLTK.utils as utils
+from HindiNLTK.benchmarks.stemmer_benchmark import synthetic_words
+
+PREDICATES = [
+    (char_features.INDICLANG_CHAR, utils.is_indiclang_char),
+    (char_features.VOWEL, utils.is_vowel),
+    (char_features.VOWEL_SIGN, utils.is_vowel_sign),
+    (char_features.HALANTA, utils.is_halanta),
+    (char_features.NUKTA, utils.is_nukta),
+    (char_features.AUM, utils.is_aum),
+    (char_features.CONSONANT, utils.is_consonant),
+    (char_features.VELAR, utils.is_velar),
+    (char_features.PALATAL, utils.is_palatal),
+    (char_features.RETROFLEX, utils.is_retroflex),
+    (char_features.DENTAL, utils.is_dental),
+    (char_features.LABIAL, utils.is_labial),
+    (char_features.VOICED, utils.is_voiced),
+    (char_features.UNVOICED, utils.is_unvoiced),
+    (char_features.ASPIRATED, utils.is_aspirated),
+    (char_features.UNASPIRATED, utils.is_unaspirated),
+    (char_features.NASAL, utils.is_nasal),
+    (char_features.FRICATIVE, utils.is_fricative),
+    (char_features.APPROXIMANT, utils.is_approximant),
+    (char_features.NUMBER, utils.is_number),
+]
+
+
+def _check():
+    chars = [chr(c) for c in range(0x10000) if not 0xd800 <= c <= 0xdfff]
+    features = char_features.text_features(''.join(chars))
+    for flag, predicate in PREDICATES:
+        expected = np.array([predicate(c, 'hi') for c in chars])
+        assert np.array_equal(char_features.has_features(features, flag), expected), predicate.__name__
+
+
+def _reference_all(words):
+    return [[[predicate(c, 'hi') for _, predicate in PREDICATES] for c in word] for word in words]
+
+
+def _table_all(words):
+    features, offsets = char_features.batch_features(words)
+    return features, offsets
+
+
+def _chars_per_sec(fn, n_chars):
+    start = time.perf_counter()
+    fn()
+    return n_chars / (time.perf_counter() - start)
+
+
+def main():
+    _check()
+    words = synthetic_words(200000)
+    text = ''.join(words)
+    n_chars = len(text)
+
+    before = _chars_per_sec(lambda: [utils.is_voiced(c, 'hi') for c in text], n_chars)
+    after = _chars_per_sec(lambda: char_features.has_features(char_features.text_features(text),
+                                                              char_features.VOICED), n_chars)
+    print('is_voiced      before {:>14,.0f} chars/s  after {:>14,.0f} chars/s  x{:.0f}'.format(
+        before, after, after / before))
+
+    before = _chars_per_sec(lambda: _reference_all(words), n_chars)
+    after = _chars_per_sec(lambda: _table_all(words), n_chars)
+    print('all, per word  before {:>14,.0f} chars/s  after {:>14,.0f} chars/s  x{:.0f}'.format(
+        before, after, after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark of the import time of the package and of its light modules, each one imported in a fresh
+process. Fails when an import takes longer than its budget or loads one of the heavy backends,
+which must only be imported when the component using them is first used.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.import_benchmark
+"""
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ('tensorflow', 'gensim', 'sentencepiece', 'nltk')
+
+# module imported: budget in seconds
+BUDGETS = {
+    'HindiNLTK': 0.05,
+    'HindiNLTK.text_utils': 0.25,
+    'HindiNLTK.normalization': 0.25,
+}
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': sorted(m for m in {heavy!r} if m in sys.modules)}}))
+'''
+
+
+def _import_once(module):
+    out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                         check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(out.decode('utf-8').strip().splitlines()[-1])
+
+
+def main(repeat=5):
+    failures = []
+    for module, budget in BUDGETS.items():
+        runs = [_import_once(module) for _ in range(repeat)]
+        # the best run leaves out the noise of the first, cold, reads of the files
+        seconds = min(run['seconds'] for run in runs)
+        heavy = runs[0]['heavy']
+        print('{:<26} {:7.1f} ms  budget {:5.0f} ms  heavy modules: {}'.format(
+            module, seconds * 1000, budget * 1000, ', '.join(heavy) or 'none'))
+        if seconds > budget:
+            failures.append('{} took {:.0f} ms'.format(module, seconds * 1000))
+        if heavy:
+            failures.append('{} imported {}'.format(module, ', '.join(heavy)))
+
+    if failures:
+        sys.exit('over budget: ' + '; '.join(failures))
+
+
+if __name__ == '__main__':
+    main()
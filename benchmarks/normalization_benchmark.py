@@ -0,0 +1,101 @@
+"""
+Benchmark of DevanagariNormalizer.normalize against the replace chain it used before the
+character tables were introduced. Checks that both produce identical output for every
+normalizer configuration and reports the throughput in chars/sec.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.normalization_benchmark
+"""
+import random
+import re
+import time
+
+from HindiNLTK.normalization import DevanagariNormalizer, NormalizerI
+
+NEWS = "इराक के विदेश मंत्री ने अमरीका के उस प्रस्ताव का मज़ाक उड़ाया है , जिसमें अमरीका ने संयुक्त राष्ट्र " \
+       "के प्रतिबंधों को इराकी नागरिकों के लिए कम हानिकारक बनाने के लिए कहा है | प्रवक्ता ने कहा, " \
+       "“हम इस पर विचार करेंगे” – लेकिन कोई फ़ैसला नहीं हुआ।\n"
+
+# every character touched by the normalizer, as a worst case
+DENSE = "इराक के विदेश मंत्री ने अमरीका के उस प्रस्ताव का मज़ाक उड़ाया है , जिसमें अमरीका ने संयुक्त " \
+        "राष्ट्र के प्रतिबंधों को इराकी नागरिकों के लिए कम हानिकारक बनाने के लिए कहा है | " \
+        "‘‘ग़ज़ल’’ – “फ़िल्म” — अंक: १२३…\u200d\u00a0\ufeff ॲ ऩ ऱ ऴ क़ ख़ ग़ ज़ ड़ ढ़ फ़ य़ ऍ ऑ ॅ ॉ ँ ञ्च ङ्क ण्ड न्त म्ब ं\n"
+
+CONFIGS = [
+    dict(),
+    dict(remove_nuktas=True),
+    dict(do_normalize_chandras=True),
+    dict(nasals_mode='to_anusvaara_strict'),
+    dict(nasals_mode='to_anusvaara_relaxed'),
+    dict(nasals_mode='to_nasal_consonants', do_normalize_chandras=True),
+    dict(do_normalize_vowel_ending=True, remove_nuktas=True),
+]
+
+
+def _reference_normalize(normalizer, text):
+    """
+    The str.replace chain of BaseNormalizer and DevanagariNormalizer before the character tables
+    """
+    text = text.replace(NormalizerI.BYTE_ORDER_MARK, '')
+    text = text.replace(NormalizerI.BYTE_ORDER_MARK_2, '')
+    text = text.replace(NormalizerI.WORD_JOINER, '')
+    text = text.replace(NormalizerI.SOFT_HYPHEN, '')
+    text = text.replace(NormalizerI.ZERO_WIDTH_SPACE, ' ')
+    text = text.replace(NormalizerI.NO_BREAK_SPACE, ' ')
+    text = text.replace(NormalizerI.ZERO_WIDTH_NON_JOINER, '')
+    text = text.replace(NormalizerI.ZERO_WIDTH_JOINER, '')
+
+    text = normalizer._normalize_puncutations(text)
+
+    if normalizer.do_normalize_chandras:
+        text = normalizer._normalize_chandras(text)
+    text = normalizer._normalize_nasals(text)
+    if normalizer.do_normalize_vowel_ending:
+        text = normalizer._normalize_vowel_ending(text)
+
+    text = text.replace('\u0972', '\u090f')
+    for composite, base in [('\u0929', '\u0928'), ('\u0931', '\u0930'), ('\u0934', '\u0933'),
+                            ('\u0958', '\u0915'), ('\u0959', '\u0916'), ('\u095A', '\u0917'),
+                            ('\u095B', '\u091C'), ('\u095C', '\u0921'), ('\u095D', '\u0922'),
+                            ('\u095E', '\u092B'), ('\u095F', '\u092F')]:
+        text = text.replace(composite, base + DevanagariNormalizer.NUKTA)
+    if normalizer.remove_nuktas:
+        text = text.replace(DevanagariNormalizer.NUKTA, '')
+    text = text.replace('\u007c', '\u0964')
+    text = re.sub(r'([\u0900-\u097f]):', '\\1\u0903', text)
+    return text
+
+
+def _random_text(n_chars, seed=0):
+    rng = random.Random(seed)
+    alphabet = list(set(DENSE)) + [chr(c) for c in range(0x0900, 0x0980)] + list(":'´")
+    return ''.join(rng.choice(alphabet) for _ in range(n_chars))
+
+
+def _throughput(fn, text, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text) / best
+
+
+def main():
+    fuzz = _random_text(200000)
+
+    for name, text in (('news', NEWS * 20000), ('dense', DENSE * 20000)):
+        print(name)
+        for config in CONFIGS:
+            normalizer = DevanagariNormalizer(**config)
+            for t in (text, fuzz):
+                assert normalizer.normalize(t) == _reference_normalize(normalizer, t), config
+
+            before = _throughput(lambda t: _reference_normalize(normalizer, t), text)
+            after = _throughput(normalizer.normalize, text)
+            print('  {:<70} before {:>12,.0f} chars/s  after {:>12,.0f} chars/s  x{:.1f}'.format(
+                str(config), before, after, after / before))
+
+
+if __name__ == '__main__':
+    main()
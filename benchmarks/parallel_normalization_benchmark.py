@@ -0,0 +1,46 @@
+"""
+Benchmark of normalize_corpus() with an increasing number of worker processes on a synthetic
+corpus. Checks that the output equals normalizing the corpus in a single process and reports the
+wall clock throughput, the speedup and the throughput of each worker.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.parallel_normalization_benchmark
+"""
+import os
+import tempfile
+import time
+
+from HindiNLTK.benchmarks.normalization_benchmark import NEWS, DENSE
+from HindiNLTK.normalization import DevanagariNormalizer, normalize_corpus
+
+
+def main():
+    normalizer = DevanagariNormalizer(nasals_mode='to_anusvaara_strict')
+    text = (NEWS * 9 + DENSE) * 20000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        in_path = os.path.join(tmp, 'corpus.txt')
+        out_path = os.path.join(tmp, 'corpus.norm.txt')
+        with open(in_path, 'w', encoding='utf-8', newline='') as in_file:
+            in_file.write(text)
+        expected = normalizer.normalize(text)
+
+        baseline = None
+        processes = 1
+        while processes <= os.cpu_count():
+            start = time.perf_counter()
+            stats = normalize_corpus(in_path, out_path, normalizer, processes=processes, shard_size=1 << 20)
+            elapsed = time.perf_counter() - start
+
+            with open(out_path, encoding='utf-8', newline='') as out_file:
+                assert out_file.read() == expected
+
+            baseline = baseline or elapsed
+            per_worker = ', '.join('{:,.0f}'.format(chars_per_sec) for _, _, chars_per_sec in stats.values())
+            print('{:>3} processes {:>12,.0f} chars/s  speedup x{:.1f}  per worker [{}]'.format(
+                processes, len(text) / elapsed, baseline / elapsed, per_worker))
+            processes *= 2
+
+
+if __name__ == '__main__':
+    main()
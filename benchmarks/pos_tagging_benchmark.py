@@ -0,0 +1,86 @@
+"""
+Benchmark of the compiled POS tagger against the beam search of the nltk TnT tagger on the pickled
+model, which recomputes the trigram probabilities from the frequency tables at each word. Checks that
+both tag random sentences of the words of the model, with unknown words, the same way and reports the
+throughput in tokens/sec, on sentences of mostly unambiguous words and on ambiguous ones.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.pos_tagging_benchmark
+"""
+import random
+import time
+from math import log
+from operator import itemgetter
+
+from HindiNLTK.pos_tagging.pos_tagging import CompiledTagger, POSTagger, load_tagger
+
+
+def _reference_tag(tnt, sent):
+    """
+    TnT.tag() of nltk 3.5, which the model was pickled with, its recursion over the words unrolled
+    """
+    current_states = [(['BOS', 'BOS'], 0.0)]
+    for word in sent:
+        C = False
+        if word in tnt._wd:
+            new_states = []
+            for (history, curr_sent_logprob) in current_states:
+                for t in tnt._wd[word].keys():
+                    tC = (t, C)
+                    p_uni = tnt._uni.freq(tC)
+                    p_bi = tnt._bi[history[-1]].freq(tC)
+                    p_tri = tnt._tri[tuple(history[-2:])].freq(tC)
+                    p_wd = tnt._wd[word][t] / tnt._uni[tC]
+                    p = tnt._l1 * p_uni + tnt._l2 * p_bi + tnt._l3 * p_tri
+                    p2 = log(p, 2) + log(p_wd, 2)
+                    new_states.append((history + [tC], curr_sent_logprob + p2))
+        else:
+            for (history, curr_sent_logprob) in current_states:
+                history.append(('Unk', C))
+            new_states = current_states
+        new_states.sort(reverse=True, key=itemgetter(1))
+        current_states = new_states[:tnt._N]
+    tags = current_states[0][0]
+    return [(sent[i], tags[i + 2][0]) for i in range(len(sent))]
+
+
+def random_sentences(words, n_sents, max_len=40, unknown_rate=0.15, seed=0):
+    rng = random.Random(seed)
+    sents = []
+    for _ in range(n_sents):
+        sents.append([rng.choice(words) if rng.random() >= unknown_rate else 'अज्ञात{}'.format(rng.randint(0, 9))
+                      for _ in range(rng.randint(0, max_len))])
+    return sents
+
+
+def _tokens_per_sec(fn, sents):
+    start = time.perf_counter()
+    result = fn(sents)
+    return result, sum(map(len, sents)) / (time.perf_counter() - start)
+
+
+def main():
+    tnt = load_tagger()
+    tagger = CompiledTagger.from_tnt(load_tagger())
+    words = list(tnt._wd.keys())
+    ambiguous = [word for word in words if len(tnt._wd[word]) > 1]
+
+    for name, sents in (('random words', random_sentences(words, 1000)),
+                        ('ambiguous words', random_sentences(ambiguous, 30, unknown_rate=0.05, seed=1))):
+        before, before_rate = _tokens_per_sec(lambda s: [_reference_tag(tnt, sent) for sent in s], sents)
+        after, after_rate = _tokens_per_sec(lambda s: [tagger.tag(sent) for sent in s], sents)
+        assert after == before
+        print('{:<16} before {:>10,.0f} tokens/s  after {:>10,.0f} tokens/s  x{:.1f}'.format(
+            name, before_rate, after_rate, after_rate / before_rate))
+
+    sents = random_sentences(words, 20000, seed=2)
+    pos_tagger = POSTagger()
+    serial, serial_rate = _tokens_per_sec(pos_tagger.tag_sents, sents)
+    parallel, parallel_rate = _tokens_per_sec(lambda s: pos_tagger.tag_sents(s, processes=2), sents)
+    assert parallel == serial
+    print('tag_sents        serial {:>10,.0f} tokens/s  2 processes {:>10,.0f} tokens/s'.format(
+        serial_rate, parallel_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark of the load of the POS tagger from the export of export_tagger(), memory mapped, against
+unpickling save.p, with and without compiling it. Exports the tagger first if missing, checks that
+the loaded tagger tags random sentences like the one compiled from the pickle and reports the
+median load time of each.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.pos_tagging_load_benchmark
+"""
+import os
+import statistics
+import time
+
+from HindiNLTK.benchmarks.pos_tagging_benchmark import random_sentences
+from HindiNLTK.pos_tagging.pos_tagging import EXPORT_DIR, CompiledTagger, export_tagger, load_tagger
+from HindiNLTK.resources import resolve_path
+
+
+def _median_seconds(fn, repeat=20):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds)
+
+
+def main():
+    export_dir = resolve_path(EXPORT_DIR)
+    if not os.path.exists(os.path.join(export_dir, 'header.json')):
+        export_tagger()
+
+    compiled = CompiledTagger.from_tnt(load_tagger())
+    loaded = CompiledTagger.load(export_dir)
+    sents = random_sentences(compiled.words, 2000)
+    assert [loaded.tag(sent) for sent in sents] == [compiled.tag(sent) for sent in sents]
+
+    pickle_seconds = _median_seconds(load_tagger)
+    for name, fn in (('pickle', load_tagger),
+                     ('pickle + compile', lambda: CompiledTagger.from_tnt(load_tagger())),
+                     ('export (mmap)', lambda: CompiledTagger.load(export_dir))):
+        seconds = _median_seconds(fn)
+        print('{:<18} {:>8.1f} ms  x{:.1f}'.format(name, seconds * 1000, pickle_seconds / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of the float16 and int8 storage modes of convert_vectors() against float32, on the
+synthetic matrix of ann_benchmark. Each matrix is written in the binary layout of convert_vectors()
+to a temporary model directory and opened by a Vectorizer, so that the searches are the ones of the
+shipped code. Reports the memory of the matrix, the Spearman correlation of the cosine similarities
+of random word pairs with the float32 ones (a word similarity benchmark without the human scores),
+and the recall@10 and latency of exact Vectorizer.get_most_similar() queries.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.quantization_benchmark
+"""
+import tempfile
+import time
+
+import numpy as np
+
+from HindiNLTK import resources
+from HindiNLTK.benchmarks.ann_benchmark import synthetic_vectors, write_vectors
+from HindiNLTK.vectors.vectors import Vectorizer, quantize_int8
+
+
+def _spearman(a, b):
+    rank_a = np.argsort(np.argsort(a))
+    rank_b = np.argsort(np.argsort(b))
+    return np.corrcoef(rank_a, rank_b)[0, 1]
+
+
+def _cosines(a, b):
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def main(n_pairs=100000, n_queries=100, topn=10):
+    vectors = synthetic_vectors()
+    words = ['w{}'.format(i) for i in range(len(vectors))]
+    rng = np.random.default_rng(2)
+    left = [words[i] for i in rng.integers(len(vectors), size=n_pairs)]
+    right = [words[i] for i in rng.integers(len(vectors), size=n_pairs)]
+    queries = [words[i] for i in rng.choice(len(vectors), size=n_queries, replace=False)]
+
+    quantized, scales = quantize_int8(vectors)
+    modes = [('float32', vectors, None), ('float16', vectors.astype(np.float16), None), ('int8', quantized, scales)]
+
+    reference = None
+    reference_found = None
+    for name, matrix, matrix_scales in modes:
+        with tempfile.TemporaryDirectory() as model_dir:
+            write_vectors(model_dir, words, matrix, matrix_scales)
+            resources.set_model_dir(model_dir)
+            resources.release('vectors')
+            try:
+                vectorizer = Vectorizer()
+                similarities = _cosines(vectorizer.get_vectors(left), vectorizer.get_vectors(right))
+                # the norms are computed on the first query
+                vectorizer.get_most_similar(queries[0], topn=topn)
+                start = time.perf_counter()
+                found = [{word for word, _ in vectorizer.get_most_similar(query, topn=topn)} for query in queries]
+                latency = (time.perf_counter() - start) / n_queries
+            finally:
+                resources.release('vectors')
+                resources.set_model_dir(None)
+        if reference is None:
+            reference, reference_found = similarities, found
+
+        recall = np.mean([len(a & b) / topn for a, b in zip(reference_found, found)])
+        extra_bytes = matrix_scales.nbytes if matrix_scales is not None else 0
+        print('{:<8} {:7.1f} MB  spearman {:.5f}  max |cos diff| {:.4f}  recall@{} {:.3f}  {:6.2f} ms/query'.format(
+            name, (matrix.nbytes + extra_bytes) / 2 ** 20, _spearman(reference, similarities),
+            np.abs(reference - similarities).max(), topn, recall, latency * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark of Stemmer against the per token endswith loop of _generate_stem_words, which rebuilt
+its suffix table on every call. Checks that both give the same stems, on random words ending with
+every suffix and on a Zipf distributed token stream, and reports the throughput in tokens/sec.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.stemmer_benchmark
+"""
+import random
+import time
+
+from HindiNLTK.stemmer import SUFFIXES, Stemmer
+
+STEM_CHARS = [chr(c) for c in range(0x0915, 0x0939)] + [u"ा", u"ि", u"ी", u"ु", u"ू", u"े", u"ो", u"ं", u"्"]
+
+
+def _reference_stem(word):
+    """
+    _generate_stem_words() before the suffix table was hoisted out of it
+    """
+    suffixes = {L: list(suffix_list) for L, suffix_list in SUFFIXES.items()}
+    for L in 5, 4, 3, 2, 1:
+        if len(word) > L + 1:
+            for suf in suffixes[L]:
+                if word.endswith(suf):
+                    return word[:-L]
+    return word
+
+
+def synthetic_words(n_words, seed=0):
+    rng = random.Random(seed)
+    all_suffixes = [suffix for suffix_list in SUFFIXES.values() for suffix in suffix_list]
+    words = []
+    for _ in range(n_words):
+        word = ''.join(rng.choice(STEM_CHARS) for _ in range(rng.randint(0, 5)))
+        if rng.random() < 0.7:
+            word += rng.choice(all_suffixes)
+        words.append(word)
+    return words
+
+
+def zipf_tokens(words, n_tokens, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return rng.choices(words, weights=weights, k=n_tokens)
+
+
+def _tokens_per_sec(fn, tokens):
+    start = time.perf_counter()
+    result = fn(tokens)
+    return result, len(tokens) / (time.perf_counter() - start)
+
+
+def main():
+    words = synthetic_words(200000)
+    assert Stemmer(cache_size=0).stem_list(words) == [_reference_stem(word) for word in words]
+
+    tokens = zipf_tokens(words[:50000], 1000000)
+    before, before_rate = _tokens_per_sec(lambda t: [_reference_stem(token) for token in t], tokens)
+    for name, stemmer in (('no cache', Stemmer(cache_size=0)), ('cache', Stemmer())):
+        after, after_rate = _tokens_per_sec(stemmer.stem_list, tokens)
+        assert after == before
+        print('{:<10} before {:>12,.0f} tokens/s  after {:>12,.0f} tokens/s  x{:.1f}'.format(
+            name, before_rate, after_rate, after_rate / before_rate))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark of Transliterate.transliterate against the word by word transliteration it did before
+the session was kept and the words batched. Checks that both give the same words and reports
+the throughput in words/sec.
+
+Run from the root of the HindiNLTK package, where the model files are, with its parent directory
+on the PYTHONPATH:
+    python -m HindiNLTK.benchmarks.transliteration_benchmark
+"""
+import random
+import time
+
+import tensorflow.compat.v1 as tf
+
+from HindiNLTK.transliterate import Transliterate, _word_to_seq
+
+SYLLABLES = ['ka', 'ki', 'ku', 'kha', 'ga', 'cha', 'ja', 'ta', 'tha', 'da', 'na', 'pa', 'pha', 'ba', 'bha',
+             'ma', 'ya', 'ra', 'la', 'va', 'sha', 'sa', 'ha', 'ai', 'au', 'ee', 'oo', 'in', 'an', 'am', 'ar']
+
+
+def _reference_transliterate(transliterator, transliterate_words):
+    """
+    The graph loading and per word sess.run of Transliterate.transliterate before batching
+    """
+    words = []
+    loaded_graph = tf.Graph()
+    with tf.Session(graph=loaded_graph) as sess:
+        loader = tf.train.import_meta_graph('transliteration/' + transliterator.load_path + '.meta')
+        loader.restore(sess, 'transliteration/' + transliterator.load_path)
+
+        input_data = loaded_graph.get_tensor_by_name('input:0')
+        logits = loaded_graph.get_tensor_by_name('predictions:0')
+        target_sequence_length = loaded_graph.get_tensor_by_name('target_sequence_length:0')
+        keep_prob = loaded_graph.get_tensor_by_name('keep_prob:0')
+
+        for transliterate_word in transliterate_words:
+            transliterate_word = _word_to_seq(transliterate_word, transliterator.source_vocab_to_int)
+            transliterate_logits = sess.run(logits, {input_data: [transliterate_word] * transliterator.batch_size,
+                                                     target_sequence_length: [len(
+                                                         transliterate_word)] * transliterator.batch_size,
+                                                     keep_prob: 1.0})[0]
+            output = ""
+            for i in transliterate_logits:
+                if transliterator.target_int_to_vocab[i] != '<EOS>':
+                    output = output + transliterator.target_int_to_vocab[i]
+            words.append(output)
+    return words
+
+
+def synthetic_words(n_words, seed=0):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(n_words)]
+
+
+def _words_per_sec(fn, words):
+    start = time.perf_counter()
+    result = fn(words)
+    return result, len(words) / (time.perf_counter() - start)
+
+
+def main():
+    transliterator = Transliterate()
+    words = synthetic_words(1000)
+
+    before, before_rate = _words_per_sec(lambda w: _reference_transliterate(transliterator, w), words)
+    after, after_rate = _words_per_sec(transliterator.transliterate, words)
+    assert before == after
+
+    print('{} words ({} distinct)  before {:,.0f} words/s  after {:,.0f} words/s  x{:.1f}'.format(
+        len(words), len(set(words)), before_rate, after_rate, after_rate / before_rate))
+
+
+if __name__ == '__main__':
+    main()
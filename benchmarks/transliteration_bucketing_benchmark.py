@@ -0,0 +1,69 @@
+"""
+Benchmark of the length bucketed batches of Transliterate against batches of words taken in input
+order and padded to the longest word, on a synthetic romanized word list. Reports the throughput
+of both in words/sec, and how many words the padding changes.
+
+Run from the root of the HindiNLTK package, where the model files are, with its parent directory
+on the PYTHONPATH:
+    python -m HindiNLTK.benchmarks.transliteration_bucketing_benchmark
+"""
+import time
+
+from HindiNLTK.benchmarks.transliteration_benchmark import synthetic_words
+from HindiNLTK.transliterate import Transliterate, _word_to_seq
+
+
+def _unbucketed_transliterate(transliterator, transliterate_words):
+    """
+    Batches of distinct words in input order, padded with <PAD> up to the longest one
+    """
+    pad_int = transliterator.source_vocab_to_int['<PAD>']
+    distinct_words = list(dict.fromkeys(transliterate_words))
+
+    transliterated = {}
+    for start in range(0, len(distinct_words), transliterator.batch_size):
+        batch = distinct_words[start:start + transliterator.batch_size]
+        seqs = [_word_to_seq(transliterate_word, transliterator.source_vocab_to_int) for transliterate_word in batch]
+        lengths = [len(seq) for seq in seqs]
+        max_length = max(lengths)
+        seqs = [seq + [pad_int] * (max_length - len(seq)) for seq in seqs]
+        seqs += [seqs[-1]] * (transliterator.batch_size - len(seqs))
+        lengths += [lengths[-1]] * (transliterator.batch_size - len(lengths))
+
+        transliterate_logits = transliterator.sess.run(transliterator.logits,
+                                                       {transliterator.input_data: seqs,
+                                                        transliterator.target_sequence_length: lengths,
+                                                        transliterator.keep_prob: 1.0})
+        for transliterate_word, row in zip(batch, transliterate_logits):
+            output = ""
+            for i in row:
+                if i == transliterator.eos_int:
+                    break
+                output = output + transliterator.target_int_to_vocab[i]
+            transliterated[transliterate_word] = output
+
+    return [transliterated[transliterate_word] for transliterate_word in transliterate_words]
+
+
+def main():
+    transliterator = Transliterate(cache_size=0)
+    words = synthetic_words(10000, seed=1)
+    # warming up the session
+    transliterator.transliterate(words[:100])
+
+    start = time.perf_counter()
+    unbucketed = _unbucketed_transliterate(transliterator, words)
+    unbucketed_rate = len(words) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    bucketed = transliterator.transliterate(words)
+    bucketed_rate = len(words) / (time.perf_counter() - start)
+
+    changed = sum(1 for a, b in zip(unbucketed, bucketed) if a != b)
+    print('{} words ({} distinct)  unbucketed {:,.0f} words/s  bucketed {:,.0f} words/s  x{:.1f}  '
+          '{} words changed by the padding'.format(len(words), len(set(words)), unbucketed_rate, bucketed_rate,
+                                                   bucketed_rate / unbucketed_rate, changed))
+
+
+if __name__ == '__main__':
+    main()
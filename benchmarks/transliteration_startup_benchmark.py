@@ -0,0 +1,65 @@
+"""
+Benchmark of the cold start of Transliterate from the training checkpoint and from the frozen
+inference graph of export_frozen_graph(), which it exports first if missing. Each one runs in a
+fresh process, after tensorflow is imported, and reports the time and the resident memory taken
+by building a Transliterate and transliterating a word list, which must be the same for both.
+
+Run from the root of the HindiNLTK package, where the model files are, with its parent directory
+on the PYTHONPATH:
+    python -m HindiNLTK.benchmarks.transliteration_startup_benchmark
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+
+def _rss_kb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run(frozen):
+    import HindiNLTK.transliterate as transliterate
+    from HindiNLTK.benchmarks.transliteration_benchmark import synthetic_words
+
+    if not frozen:
+        transliterate.FROZEN_GRAPH_PATH = os.devnull + '.missing'
+    words = synthetic_words(300)
+
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    transliterator = transliterate.Transliterate(cache_size=0)
+    transliterated = transliterator.transliterate(words)
+    seconds = time.perf_counter() - start
+    print(json.dumps({'seconds': seconds, 'rss_kb': _rss_kb() - rss_before, 'words': transliterated}))
+
+
+def main():
+    from HindiNLTK.resources import resolve_path
+    from HindiNLTK.transliterate import FROZEN_GRAPH_PATH, export_frozen_graph
+    if not os.path.exists(resolve_path(FROZEN_GRAPH_PATH)):
+        export_frozen_graph()
+
+    results = {}
+    for frozen in (False, True):
+        out = subprocess.run([sys.executable, '-m', __spec__.name, 'frozen' if frozen else 'checkpoint'],
+                             check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+        results[frozen] = json.loads(out.decode('utf-8').strip().splitlines()[-1])
+    assert results[False]['words'] == results[True]['words']
+
+    for frozen, name in ((False, 'checkpoint'), (True, 'frozen graph')):
+        print('{:<14} {:6.2f} s  {:8,} KB resident'.format(name, results[frozen]['seconds'],
+                                                         results[frozen]['rss_kb']))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        _run(sys.argv[1] == 'frozen')
+    else:
+        main()
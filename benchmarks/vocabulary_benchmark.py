@@ -0,0 +1,67 @@
+"""
+Benchmark of Vocabulary.process_documents against remove_stopwords() followed by generate_stem_list(),
+run document by document, with the cached Stemmer and with the uncached rules of _generate_stem_words.
+Checks that the decoded ids are the same tokens and reports the throughput in tokens/sec on Zipf
+distributed documents.
+
+Run from the directory containing the HindiNLTK package:
+    python -m HindiNLTK.benchmarks.vocabulary_benchmark
+"""
+import random
+import time
+
+from HindiNLTK.benchmarks.stemmer_benchmark import synthetic_words, zipf_tokens
+from HindiNLTK.stopwords import StopwordFilter
+from HindiNLTK.text_utils import _generate_stem_words, generate_stem_list, remove_stopwords
+from HindiNLTK.vocabulary import Vocabulary
+
+STOPWORDS = StopwordFilter().words
+
+
+def synthetic_documents(n_documents, n_types=100000, seed=0):
+    rng = random.Random(seed)
+    # the stopwords, and the words of the multi-word ones, are the most frequent types, as in real text
+    words = sorted({word for stopword in STOPWORDS for word in stopword.split()}) + synthetic_words(n_types, seed)
+    tokens = zipf_tokens(words, n_documents * 100, seed)
+    documents = []
+    start = 0
+    for _ in range(n_documents):
+        length = rng.randint(20, 180)
+        documents.append(tokens[start:start + length])
+        start += length
+    return documents
+
+
+def main():
+    documents = synthetic_documents(20000)
+    n_tokens = sum(len(tokens) for tokens in documents)
+
+    start = time.perf_counter()
+    uncached = [[_generate_stem_words(token) for token in remove_stopwords(tokens)] for tokens in documents]
+    uncached_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    before = [generate_stem_list(remove_stopwords(tokens)) for tokens in documents]
+    before_seconds = time.perf_counter() - start
+    assert before == uncached
+
+    vocabulary = Vocabulary()
+    start = time.perf_counter()
+    after = vocabulary.process_documents(documents)
+    after_seconds = time.perf_counter() - start
+    assert [vocabulary.decode(ids) for ids in after] == before
+
+    # once the vocabulary is known, only the interning is left per token
+    start = time.perf_counter()
+    vocabulary.process_documents(documents)
+    warm_seconds = time.perf_counter() - start
+
+    print('{:,} tokens, {:,} types'.format(n_tokens, len(vocabulary)))
+    print('uncached     {:>12,.0f} tokens/s'.format(n_tokens / uncached_seconds))
+    print('per token    {:>12,.0f} tokens/s'.format(n_tokens / before_seconds))
+    print('vocabulary   {:>12,.0f} tokens/s  x{:.1f}'.format(n_tokens / after_seconds, before_seconds / after_seconds))
+    print('  known      {:>12,.0f} tokens/s  x{:.1f}'.format(n_tokens / warm_seconds, before_seconds / warm_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import numpy as np
+
+import HindiNLTK.utils as utils
+
+# the character classes of the utils predicates as bit flags, precomputed for every offset of the
+# script block, to classify whole strings or codepoint arrays with NumPy instead of char by char
+INDICLANG_CHAR = 1 << 0
+VOWEL = 1 << 1
+VOWEL_SIGN = 1 << 2
+HALANTA = 1 << 3
+NUKTA = 1 << 4
+AUM = 1 << 5
+CONSONANT = 1 << 6
+VELAR = 1 << 7
+PALATAL = 1 << 8
+RETROFLEX = 1 << 9
+DENTAL = 1 << 10
+LABIAL = 1 << 11
+VOICED = 1 << 12
+UNVOICED = 1 << 13
+ASPIRATED = 1 << 14
+UNASPIRATED = 1 << 15
+NASAL = 1 << 16
+FRICATIVE = 1 << 17
+APPROXIMANT = 1 << 18
+NUMBER = 1 << 19
+
+# number of offsets of a script block
+BLOCK_SIZE = 0x80
+
+# the flag of each predicate on the offsets of utils
+_OFFSET_PREDICATES = [
+    (VOWEL, utils.is_vowel_offset),
+    (VOWEL_SIGN, utils.is_vowel_sign_offset),
+    (HALANTA, utils.is_halanta_offset),
+    (NUKTA, utils.is_nukta_offset),
+    (AUM, utils.is_aum_offset),
+    (CONSONANT, utils.is_consonant_offset),
+    (VELAR, utils.is_velar_offset),
+    (PALATAL, utils.is_palatal_offset),
+    (RETROFLEX, utils.is_retroflex_offset),
+    (DENTAL, utils.is_dental_offset),
+    (LABIAL, utils.is_labial_offset),
+    (VOICED, utils.is_voiced_offset),
+    (UNVOICED, utils.is_unvoiced_offset),
+    (ASPIRATED, utils.is_aspirated_offset),
+    (UNASPIRATED, utils.is_unaspirated_offset),
+    (NASAL, utils.is_nasal_offset),
+    (FRICATIVE, utils.is_fricative_offset),
+    (APPROXIMANT, utils.is_approximant_offset),
+    (NUMBER, utils.is_number_offset),
+]
+
+
+def _build_table():
+    table = np.zeros(BLOCK_SIZE, dtype=np.uint32)
+    for offset in range(BLOCK_SIZE):
+        # every offset of the block is a character of the language, see utils.is_indiclang_char
+        flags = INDICLANG_CHAR
+        for flag, predicate in _OFFSET_PREDICATES:
+            if predicate(offset):
+                flags |= flag
+        table[offset] = flags
+    return table
+
+
+# the flags of each offset of the script block, the characters outside of it have none
+FEATURE_TABLE = _build_table()
+
+
+def codepoint_features(codepoints, lang='hi'):
+    """
+    Returns the flags of each codepoint of an integer array, as a uint32 array
+    """
+    offsets = np.asarray(codepoints, dtype=np.int64) - utils.SCRIPT_RANGES[lang][0]
+    in_block = (offsets >= 0) & (offsets < BLOCK_SIZE)
+    return np.where(in_block, FEATURE_TABLE[np.where(in_block, offsets, 0)], 0).astype(np.uint32)
+
+
+def text_codepoints(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+def text_features(text, lang='hi'):
+    """
+    Returns the flags of each character of text, as a uint32 array
+    """
+    return codepoint_features(text_codepoints(text), lang)
+
+
+def batch_features(words, lang='hi'):
+    """
+    Returns the flags of the characters of all the words, concatenated, with the offsets of the
+    words in them: the flags of words[i] are features[offsets[i]:offsets[i + 1]]
+    """
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum([len(word) for word in words], out=offsets[1:])
+    return text_features(''.join(words), lang), offsets
+
+
+def has_features(features, flags):
+    """
+    Returns a boolean array of whether each element of features has any of flags,
+    e.g. has_features(text_features(word), VOICED | NASAL)
+    """
+    return (features & flags) != 0
+
+
+def count_features(features, offsets, flags):
+    """
+    Returns the number of characters of each word of batch_features() having any of flags
+    """
+    cumulative = np.zeros(len(features) + 1, dtype=np.int64)
+    np.cumsum(has_features(features, flags), out=cumulative[1:])
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
@@ -1,4 +1,5 @@
-import sys, codecs, string, itertools, re
+import sys, codecs, string, itertools, re, os, time
+import multiprocessing
 from os import name
 
 import HindiNLTK.utils as utils
@@ -29,12 +30,108 @@ class NormalizerI(object):
     ZERO_WIDTH_NON_JOINER = '\u200C'
     ZERO_WIDTH_JOINER = '\u200D'
 
+    # default number of characters normalized at a time by normalize_stream()
+    STREAM_CHUNK_SIZE = 1 << 20
+
     def normalize(self, text):
         pass
 
+    def normalize_stream(self, chunks, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Normalize an iterable of strings, e.g. the lines of a file, yielding the normalized text in
+        chunks of about chunk_size characters, so that memory stays bounded for arbitrarily large input.
+        The input is cut after a newline or a space: no normalization rule matches across them,
+        so the concatenated output is identical to normalizing the concatenated input at once.
+        Without any in chunk_size characters, it is cut between two characters of _STREAM_CUT_CHARS.
+        Only a text with neither of them, e.g. of Devanagari without spaces, is held back until one
+        arrives or the input ends.
+        """
+        buffer = []
+        buffered = 0
+        # the last position in the buffer after a newline or a space, and, while there is none, the
+        # last one between two _STREAM_CUT_CHARS, 0 if none. Each chunk is only scanned once
+        cut = 0
+        forced_cut = 0
+        last_char = ''
+        for chunk in chunks:
+            if not chunk:
+                continue
+            chunk_cut = max(chunk.rfind('\n'), chunk.rfind(' ')) + 1
+            if chunk_cut:
+                cut = buffered + chunk_cut
+            elif not cut:
+                # with the last character before the chunk, for a cut between the two
+                chunk_cut = _last_stream_cut(last_char + chunk)
+                if chunk_cut:
+                    forced_cut = buffered - len(last_char) + chunk_cut
+            buffer.append(chunk)
+            buffered += len(chunk)
+            last_char = chunk[-1]
+            position = cut or forced_cut
+            if buffered < chunk_size or position == 0:
+                continue
+
+            text = ''.join(buffer)
+            yield self.normalize(text[:position])
+            buffer = [text[position:]]
+            buffered = len(buffer[0])
+            # the cut was the last one of the buffer
+            cut = forced_cut = 0
+
+        if buffered > 0:
+            yield self.normalize(''.join(buffer))
+
+    def normalize_file(self, path, out_path=None, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Normalize a UTF-8 file with bounded memory, see normalize_stream().
+        Returns a generator over the normalized chunks, or writes them to out_path if given.
+        Line endings are kept as they are in the input.
+        """
+        if out_path is None:
+            return self._iter_normalized_file(path, chunk_size)
+
+        with open(out_path, 'w', encoding='utf-8', newline='') as out_file:
+            for normalized in self._iter_normalized_file(path, chunk_size):
+                out_file.write(normalized)
+
+    def _iter_normalized_file(self, path, chunk_size):
+        with open(path, 'r', encoding='utf-8', newline='') as in_file:
+            # fixed size reads instead of lines, so that a single huge line is cut too, see normalize_stream()
+            for normalized in self.normalize_stream(iter(lambda: in_file.read(chunk_size), ''), chunk_size):
+                yield normalized
+
+
+# the characters which no normalization rule reads across: none of the Indic scripts, of the
+# characters substituted or deleted, nor the apostrophe and the colon of the "''" and visarga rules
+_STREAM_CUT_CHARS = '[^\u0900-\u0DFF\'":|\uFEFF\uFFFE\u2060\u00AD\u200B\u00A0\u200C\u200D„“”–—´‘‚’…]'
+# two of them, searched in the reversed text for the last pair
+_STREAM_CUT_PAT = re.compile(_STREAM_CUT_CHARS * 2)
+
+
+def _last_stream_cut(text):
+    """
+    Returns the last position of text between two _STREAM_CUT_CHARS, 0 if none
+    """
+    mobj = _STREAM_CUT_PAT.search(text[::-1])
+    return len(text) - 1 - mobj.start() if mobj else 0
+
 
 class BaseNormalizer(NormalizerI):
 
+    # single character punctuation normalizations from MosesNormalizer, see _normalize_puncutations()
+    PUNCTUATION_SUBSTITUTIONS = [
+        ('„', r'"'),
+        ('“', r'"'),
+        ('”', r'"'),
+        ('–', r'-'),
+        ('—', r' - '),
+        ('´', r"'"),
+        ('‘', r"'"),
+        ('‚', r"'"),
+        ('’', r"'"),
+        ('…', r'...'),
+    ]
+
     def __init__(self, lang,
                  remove_nuktas=False,
                  nasals_mode='do_nothing',
@@ -50,6 +147,7 @@ class BaseNormalizer(NormalizerI):
         self._init_normalize_chandras()
         self._init_normalize_nasals()
         self._init_normalize_vowel_ending()
+        self._init_translation_tables()
         # self._init_visarga_correction()
 
     def _init_normalize_vowel_ending(self):
@@ -73,6 +171,56 @@ class BaseNormalizer(NormalizerI):
             (utils.offset_to_char(x[0], self.lang), utils.offset_to_char(x[1], self.lang))
             for x in substitution_offsets]
 
+    def _init_translation_tables(self):
+        """
+        Compile the fixed single character substitutions into lookup tables, so that normalize()
+        only copies the text for the characters it actually contains, once per character.
+        The script specific substitutions can only be merged into the common table when no nasal or
+        vowel ending normalization runs between the two stages, since those depend on the composite
+        characters which the script substitutions decompose, and when they delete no characters,
+        since a deletion (e.g. of a nukta) could create a "''" which the common stage must not see.
+        """
+        common_substitutions = self._common_char_substitutions()
+        script_substitutions = self._script_char_substitutions()
+
+        if self.nasals_mode not in ('to_anusvaara_strict', 'to_anusvaara_relaxed', 'to_nasal_consonants') \
+                and not self.do_normalize_vowel_ending \
+                and all(repl for _, repl in script_substitutions):
+            self.common_table = _CharTable(common_substitutions + script_substitutions)
+            self.script_table = None
+        else:
+            self.common_table = _CharTable(common_substitutions)
+            self.script_table = _CharTable(script_substitutions)
+
+    def _common_char_substitutions(self):
+        """
+        Single character substitutions of the common normalization, in the order they are applied
+        """
+        substitutions = [
+            (NormalizerI.BYTE_ORDER_MARK, ''),
+            (NormalizerI.BYTE_ORDER_MARK_2, ''),
+            (NormalizerI.WORD_JOINER, ''),
+            (NormalizerI.SOFT_HYPHEN, ''),
+
+            (NormalizerI.ZERO_WIDTH_SPACE, ' '),
+            (NormalizerI.NO_BREAK_SPACE, ' '),
+
+            (NormalizerI.ZERO_WIDTH_NON_JOINER, ''),
+            (NormalizerI.ZERO_WIDTH_JOINER, ''),
+        ]
+        substitutions.extend(BaseNormalizer.PUNCTUATION_SUBSTITUTIONS)
+
+        if self.do_normalize_chandras:
+            substitutions.extend(self.chandra_substitutions)
+        return substitutions
+
+    def _script_char_substitutions(self):
+        """
+        Single character substitutions of the script specific normalization, in the order they are applied.
+        To be overridden by the script specific normalizers
+        """
+        return []
+
     def _normalize_chandras(self, text):
         for match, repl in self.chandra_substitutions:
             text = text.replace(match, repl)
@@ -239,18 +387,10 @@ class BaseNormalizer(NormalizerI):
         from sacremoses
         """
         text = text.replace(NormalizerI.BYTE_ORDER_MARK, '')
-        text = text.replace('„', r'"')
-        text = text.replace('“', r'"')
-        text = text.replace('”', r'"')
-        text = text.replace('–', r'-')
-        text = text.replace('—', r' - ')
-        text = text.replace('´', r"'")
-        text = text.replace('‘', r"'")
-        text = text.replace('‚', r"'")
-        text = text.replace('’', r"'")
+        for match, repl in BaseNormalizer.PUNCTUATION_SUBSTITUTIONS:
+            text = text.replace(match, repl)
         text = text.replace("''", r'"')
         text = text.replace('´´', r'"')
-        text = text.replace('…', r'...')
 
         return text
 
@@ -258,21 +398,13 @@ class BaseNormalizer(NormalizerI):
         """
         Method to be implemented for normalization for each script
         """
-        text = text.replace(NormalizerI.BYTE_ORDER_MARK, '')
-        text = text.replace(NormalizerI.BYTE_ORDER_MARK_2, '')
-        text = text.replace(NormalizerI.WORD_JOINER, '')
-        text = text.replace(NormalizerI.SOFT_HYPHEN, '')
+        # control characters, punctuations and chandras, and the script specific substitutions
+        # when they could be merged
+        text = self.common_table.translate(text)
+        # the only multi character punctuation rule. '´´' never matches, since '´' is already replaced
+        if "''" in text:
+            text = text.replace("''", r'"')
 
-        text = text.replace(NormalizerI.ZERO_WIDTH_SPACE, ' ')  # ??
-        text = text.replace(NormalizerI.NO_BREAK_SPACE, ' ')
-
-        text = text.replace(NormalizerI.ZERO_WIDTH_NON_JOINER, '')
-        text = text.replace(NormalizerI.ZERO_WIDTH_JOINER, '')
-
-        text = self._normalize_puncutations(text)
-
-        if self.do_normalize_chandras:
-            text = self._normalize_chandras(text)
         text = self._normalize_nasals(text)
         if self.do_normalize_vowel_ending:
             text = self._normalize_vowel_ending(text)
@@ -309,44 +441,176 @@ class DevanagariNormalizer(BaseNormalizer):
     """
 
     NUKTA = '\u093C'
+    COLON_PAT = re.compile(r':')
 
     def __init__(self, lang='hi', remove_nuktas=False, nasals_mode='do_nothing',
                  do_normalize_chandras=False, do_normalize_vowel_ending=False):
         super(DevanagariNormalizer, self).__init__(lang, remove_nuktas, nasals_mode, do_normalize_chandras,
                                                    do_normalize_vowel_ending)
 
+    def _script_char_substitutions(self):
+        substitutions = [
+            # chandra a replacement for Marathi
+            ('\u0972', '\u090f'),
+
+            # decomposing Nukta based composite characters
+            ('\u0929', '\u0928' + DevanagariNormalizer.NUKTA),
+            ('\u0931', '\u0930' + DevanagariNormalizer.NUKTA),
+            ('\u0934', '\u0933' + DevanagariNormalizer.NUKTA),
+            ('\u0958', '\u0915' + DevanagariNormalizer.NUKTA),
+            ('\u0959', '\u0916' + DevanagariNormalizer.NUKTA),
+            ('\u095A', '\u0917' + DevanagariNormalizer.NUKTA),
+            ('\u095B', '\u091C' + DevanagariNormalizer.NUKTA),
+            ('\u095C', '\u0921' + DevanagariNormalizer.NUKTA),
+            ('\u095D', '\u0922' + DevanagariNormalizer.NUKTA),
+            ('\u095E', '\u092B' + DevanagariNormalizer.NUKTA),
+            ('\u095F', '\u092F' + DevanagariNormalizer.NUKTA),
+        ]
+
+        if self.remove_nuktas:
+            substitutions.append((DevanagariNormalizer.NUKTA, ''))
+
+        # replace pipe character for poorna virama
+        substitutions.append(('\u007c', '\u0964'))
+
+        return substitutions
+
+    def _correct_visarga(self, mobj):
+        start = mobj.start()
+        if start > 0 and '\u0900' <= mobj.string[start - 1] <= '\u097f':
+            return '\u0903'
+        return ':'
+
     def normalize(self, text):
         # common normalization for Indic scripts
         text = super(DevanagariNormalizer, self).normalize(text)
 
-        # chandra a replacement for Marathi
-        text = text.replace('\u0972', '\u090f')
-
-        # decomposing Nukta based composite characters
-        text = text.replace('\u0929', '\u0928' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u0931', '\u0930' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u0934', '\u0933' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u0958', '\u0915' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u0959', '\u0916' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u095A', '\u0917' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u095B', '\u091C' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u095C', '\u0921' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u095D', '\u0922' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u095E', '\u092B' + DevanagariNormalizer.NUKTA)
-        text = text.replace('\u095F', '\u092F' + DevanagariNormalizer.NUKTA)
+        # chandra a, nukta decomposition and poorna virama, unless already merged into the common pass
+        if self.script_table is not None:
+            text = self.script_table.translate(text)
 
-        if self.remove_nuktas:
-            text = text.replace(DevanagariNormalizer.NUKTA, '')
+        # correct visarga, same as re.sub(r'([\u0900-\u097f]):', '\\1\u0903', text) but searching for the
+        # colons alone, which are rare, instead of trying the character class at every position
+        if ':' in text:
+            text = DevanagariNormalizer.COLON_PAT.sub(self._correct_visarga, text)
 
-        # replace pipe character for poorna virama
-        text = text.replace('\u007c', '\u0964')
+        return text
 
-        # correct visarga
-        text = re.sub(r'([\u0900-\u097f]):', '\\1\u0903', text)
 
+class _CharTable(object):
+    """
+    An ordered list of single character substitutions, composed into one table with a single entry per
+    source character. Every character is replaced independently of its neighbours, so running the whole
+    chain on each source character gives the same result as running it on the text. As long as no
+    composed output contains a source character, the entries can then be applied in any order, and
+    only the characters actually present in the text cost a copy of it.
+    """
+
+    def __init__(self, substitutions):
+        self.table = {}
+        for match, _ in substitutions:
+            out = match
+            for m, repl in substitutions:
+                out = out.replace(m, repl)
+            if out != match:
+                self.table[match] = out
+
+        for match, out in self.table.items():
+            if any(c in self.table for c in out):
+                raise ValueError('Substitution of {!r} produces a character which is itself substituted'.format(match))
+
+        self.items = list(self.table.items())
+
+    def translate(self, text):
+        for match, repl in self.items:
+            if match in text:
+                text = text.replace(match, repl)
         return text
 
 
+# default size in bytes of the file shards normalized by each task of normalize_corpus()
+CORPUS_SHARD_SIZE = 1 << 24
+
+_worker_normalizer = None
+
+
+def _init_corpus_worker(normalizer):
+    global _worker_normalizer
+    _worker_normalizer = normalizer
+
+
+def _normalize_shard(shard):
+    path, start, end = shard
+    begin = time.perf_counter()
+    with open(path, 'rb') as in_file:
+        in_file.seek(start)
+        text = in_file.read(end - start).decode('utf-8')
+    normalized = _worker_normalizer.normalize(text)
+    return os.getpid(), len(text), time.perf_counter() - begin, normalized.encode('utf-8')
+
+
+def _shard_file(path, shard_size):
+    """
+    Split a file into byte ranges of about shard_size bytes, each ending right after a newline.
+    A newline byte never occurs inside a multi byte UTF-8 sequence, and no normalization rule
+    matches across a newline, so the shards can be decoded and normalized independently.
+    """
+    size = os.path.getsize(path)
+    shards = []
+    with open(path, 'rb') as in_file:
+        start = 0
+        while start < size:
+            end = start + shard_size
+            if end >= size:
+                end = size
+            else:
+                in_file.seek(end)
+                while True:
+                    block = in_file.read(1 << 16)
+                    if not block:
+                        end = size
+                        break
+                    newline = block.find(b'\n')
+                    if newline >= 0:
+                        end += newline + 1
+                        break
+                    end += len(block)
+            shards.append((path, start, end))
+            start = end
+    return shards
+
+
+def normalize_corpus(in_paths, out_path, normalizer=None, processes=None, shard_size=CORPUS_SHARD_SIZE):
+    """
+    Normalize one or more UTF-8 files in parallel and write the result to out_path, in the order
+    of the input files and of their lines.
+    The files are split into byte ranges ending at line boundaries, which a pool of processes
+    normalizes with the same normalizer (a default DevanagariNormalizer unless given).
+    Returns the throughput of each worker process, as a dict from its pid to a tuple
+    (characters, seconds, characters per second).
+    """
+    if isinstance(in_paths, str):
+        in_paths = [in_paths]
+    if normalizer is None:
+        normalizer = DevanagariNormalizer()
+
+    shards = []
+    for path in in_paths:
+        shards.extend(_shard_file(path, shard_size))
+
+    stats = {}
+    with multiprocessing.Pool(processes, initializer=_init_corpus_worker, initargs=(normalizer,)) as pool, \
+            open(out_path, 'wb') as out_file:
+        # imap keeps the order of the shards, whichever worker finishes first
+        for pid, n_chars, seconds, normalized in pool.imap(_normalize_shard, shards):
+            out_file.write(normalized)
+            total_chars, total_seconds = stats.get(pid, (0, 0.0))
+            stats[pid] = (total_chars + n_chars, total_seconds + seconds)
+
+    return {pid: (n_chars, seconds, n_chars / seconds if seconds > 0 else 0.0)
+            for pid, (n_chars, seconds) in stats.items()}
+
+
 # print("hi")
 # n = DevanagariNormalizer()
 # print(n.normalize("ही माय मेंअमे || इस वैभव ।। //"))
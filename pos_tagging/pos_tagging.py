@@ -1,16 +1,273 @@
+import json
+import multiprocessing
+import os
 import pickle
+from math import log
+
+import numpy as np
+
+from HindiNLTK.resources import get_resource, resolve_path
+
+MODEL_PATH = 'pos_tagging/save.p'
+# binary layout written by export_tagger(): the arrays of CompiledTagger as .npy files, memory mapped
+# by the processes loading them, the tags and the words one per line and a header with the version
+EXPORT_DIR = 'pos_tagging/tnt'
+FORMAT_VERSION = 1
+_ARRAY_NAMES = ('transitions', 'word_offsets', 'word_tags', 'emissions')
+# tag of the words which are not in the vocabulary of the model
+UNKNOWN_TAG = 'Unk'
+BOS_TAG = 'BOS'
+
+_worker_tagger = None
+
+
+def _init_worker():
+    global _worker_tagger
+    _worker_tagger = POSTagger()
+
+
+def _tag_sents_chunk(sents):
+    return _worker_tagger.tag_sents(sents)
 
 
 class POSTagger:
 
     def __init__(self):
-        self.tagger = load_tagger()
+        # the tagger is loaded and compiled once per process and shared by all the POSTaggers
+        self.tagger = get_resource('pos_tagger', load_compiled_tagger)
 
     def tag(self, words):
         return self.tagger.tag(words)
 
+    def tag_sents(self, sents, processes=None, chunk_size=1000):
+        """
+        tag() for a list of sentences, each a list of words. With processes, the list is cut into
+        chunks of chunk_size sentences which a pool of that many processes tags.
+        """
+        if processes is None:
+            tag = self.tagger.tag
+            return [tag(words) for words in sents]
+
+        sents = list(sents)
+        chunks = [sents[start:start + chunk_size] for start in range(0, len(sents), chunk_size)]
+        results = []
+        with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+            for result in pool.imap(_tag_sents_chunk, chunks):
+                results.extend(result)
+        return results
+
+
+class CompiledTagger:
+    """
+    The TnT model of save.p with its probabilities precomputed. The pickled TnT tagger recomputes
+    the interpolated trigram probability of every tag of every history in its beam, from its
+    frequency tables, at each word. Here the log probabilities of all the tag trigrams are a table
+    and those of the tags of each word are looked up once, so that a step of the beam search only
+    adds them up. The beam search is the one of the TnT tagger, the scores being computed in the
+    same order and the histories ranked by the same stable sort, so the tags are identical.
+    """
+
+    # number of candidate histories from which a step of the beam search runs on NumPy arrays,
+    # below it the lists of Python floats are faster
+    ARRAY_STEP_SIZE = 64
+
+    def __init__(self, tags, transitions, words, word_offsets, word_tags, emissions, beam_size):
+        """
+        tags are the names of the tag ids and transitions[h2, h1, t] the log2 probability of tag t
+        after tags h2, h1. The ids of the tags of words[i] and their log2 emission probabilities, in
+        the order of the tags in the model, are word_tags and emissions[word_offsets[i]:word_offsets[i + 1]]
+        """
+        self.tags = tags
+        self.transitions = transitions
+        self.words = words
+        self.word_offsets = word_offsets
+        self.word_tags = word_tags
+        self.emissions = emissions
+        self.beam_size = beam_size
+        self._bos_id = tags.index(BOS_TAG)
+        self._unknown_id = tags.index(UNKNOWN_TAG)
+        n_tags = len(tags)
+        # the transitions from each history, indexed by the pair of its last two tags h2 * n_tags + h1
+        self._pair_transitions = transitions.reshape(n_tags * n_tags, n_tags)
+        # the steps on Python lists read the arrays through memoryviews, which give Python numbers
+        # without copying the arrays, memory mapped by load(), into each process
+        self._transition_view = memoryview(np.ascontiguousarray(transitions).reshape(-1))
+        self._offset_view = memoryview(np.ascontiguousarray(word_offsets))
+        self._word_tag_view = memoryview(np.ascontiguousarray(word_tags))
+        self._emission_view = memoryview(np.ascontiguousarray(emissions))
+        self._word_ids = dict(zip(words, range(len(words))))
+
+    @classmethod
+    def from_tnt(cls, tnt):
+        """
+        Compiles an nltk TnT tagger, without capitalization flags nor a tagger for the unknown words
+        """
+        if tnt._C or tnt._unk is not None:
+            raise ValueError('the TnT tagger uses capitalization or an unknown word tagger')
+        model_tags = sorted({tag for tag, _ in tnt._uni})
+        tags = [BOS_TAG] + model_tags + ([UNKNOWN_TAG] if UNKNOWN_TAG not in model_tags else [])
+        n_tags = len(tags)
+
+        # the histories are (tag, C) pairs but for the BOS history of the first words
+        def history(tag_id):
+            return tags[tag_id] if tag_id == 0 else (tags[tag_id], False)
+
+        transitions = np.full((n_tags, n_tags, n_tags), -np.inf)
+        for t in range(1, n_tags):
+            tC = (tags[t], False)
+            if tC not in tnt._uni:
+                continue
+            p_uni = tnt._uni.freq(tC)
+            for h1 in range(n_tags):
+                # the missing conditions are empty distributions, of frequency 0
+                bi = tnt._bi.get(history(h1))
+                p_bi = bi.freq(tC) if bi is not None else 0
+                for h2 in range(n_tags):
+                    tri = tnt._tri.get((history(h2), history(h1)))
+                    p_tri = tri.freq(tC) if tri is not None else 0
+                    p = tnt._l1 * p_uni + tnt._l2 * p_bi + tnt._l3 * p_tri
+                    transitions[h2, h1, t] = log(p, 2)
+
+        tag_ids = {tag: tag_id for tag_id, tag in enumerate(tags)}
+        words = list(tnt._wd.keys())
+        word_tags = []
+        emissions = []
+        for word in words:
+            freqs = tnt._wd[word]
+            for t in freqs.keys():
+                word_tags.append(tag_ids[t])
+                emissions.append(log(freqs[t] / tnt._uni[(t, False)], 2))
+        word_offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum([len(tnt._wd[word]) for word in words], out=word_offsets[1:])
+        return cls(tags, transitions, words, word_offsets, np.array(word_tags, dtype=np.int32),
+                   np.array(emissions, dtype=np.float64), tnt._N)
+
+    def save(self, path):
+        """
+        Writes the tagger to the directory path, see EXPORT_DIR
+        """
+        if any('\n' in line for line in self.words + self.tags):
+            raise ValueError('a word or a tag contains a newline')
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAY_NAMES:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+        for name, lines in (('tags.txt', self.tags), ('words.txt', self.words)):
+            with open(os.path.join(path, name), 'w', encoding='utf-8', newline='\n') as out_file:
+                for line in lines:
+                    out_file.write(line + '\n')
+        with open(os.path.join(path, 'header.json'), 'w') as out_file:
+            json.dump({'format_version': FORMAT_VERSION, 'beam_size': self.beam_size}, out_file)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads the tagger of save() from the directory path. The arrays are memory mapped and read in
+        place, so that the worker processes share one page cached copy, only the index of the words
+        is built in each process
+        """
+        with open(os.path.join(path, 'header.json')) as in_file:
+            header = json.load(in_file)
+        if header['format_version'] != FORMAT_VERSION:
+            raise ValueError('{} has version {} of the tagger format, not {}, export it again'.format(
+                path, header['format_version'], FORMAT_VERSION))
+        arrays = {name: np.asarray(np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+                  for name in _ARRAY_NAMES}
+        tags, words = (_read_lines(os.path.join(path, name)) for name in ('tags.txt', 'words.txt'))
+        return cls(tags, words=words, beam_size=header['beam_size'], **arrays)
+
+    def tag(self, words):
+        n_tags = len(self.tags)
+        unknown_id = self._unknown_id
+        # the beam, as the pair of the last two tags and the log probability of each history, in
+        # lists until a step has ARRAY_STEP_SIZE candidates, then in arrays as the beam never shrinks
+        pairs = [self._bos_id * n_tags + self._bos_id]
+        scores = [0.0]
+        as_arrays = False
+        # per word, the index in the previous beam of each history and its tag
+        parents = []
+        word_tags = []
+        for word in words:
+            word_id = self._word_ids.get(word)
+            if word_id is None:
+                # every history is extended with the unknown tag, the beam keeps its order
+                parents.append(None)
+                word_tags.append(None)
+                if as_arrays:
+                    pairs = pairs % n_tags * n_tags + unknown_id
+                else:
+                    pairs = [pair % n_tags * n_tags + unknown_id for pair in pairs]
+                continue
+
+            start = self._offset_view[word_id]
+            end = self._offset_view[word_id + 1]
+            if not as_arrays and len(pairs) * (end - start) >= self.ARRAY_STEP_SIZE:
+                pairs = np.array(pairs, dtype=np.intp)
+                scores = np.array(scores)
+                as_arrays = True
+            if as_arrays:
+                pairs, scores, parent, last_tags = self._array_step(pairs, scores, start, end)
+            else:
+                pairs, scores, parent, last_tags = self._list_step(pairs, scores, start, end)
+            parents.append(parent)
+            word_tags.append(last_tags)
+
+        result = [unknown_id] * len(word_tags)
+        i = 0
+        for position in range(len(word_tags) - 1, -1, -1):
+            if parents[position] is not None:
+                result[position] = int(word_tags[position][i])
+                i = int(parents[position][i])
+        tags = self.tags
+        return [(word, tags[tag_id]) for word, tag_id in zip(words, result)]
+
+    def _list_step(self, pairs, scores, start, end):
+        n_tags = len(self.tags)
+        transitions = self._transition_view
+        word_tag_list = list(zip(self._word_tag_view[start:end].tolist(), self._emission_view[start:end].tolist()))
+        candidates = [score + (transitions[pair * n_tags + t] + emission)
+                      for pair, score in zip(pairs, scores) for t, emission in word_tag_list]
+        # a stable sort by decreasing score keeps the equal histories in the order they were made
+        best = sorted(range(len(candidates)), key=candidates.__getitem__, reverse=True)[:self.beam_size]
+        k = end - start
+        parent = [i // k for i in best]
+        last_tags = [word_tag_list[i % k][0] for i in best]
+        new_pairs = [pairs[j] % n_tags * n_tags + t for j, t in zip(parent, last_tags)]
+        return new_pairs, [candidates[i] for i in best], parent, last_tags
+
+    def _array_step(self, pairs, scores, start, end):
+        n_tags = len(self.tags)
+        tag_ids = self.word_tags[start:end]
+        emissions = self.emissions[start:end]
+        candidates = (scores[:, None] + (self._pair_transitions[pairs[:, None], tag_ids] + emissions)).ravel()
+        best = np.argsort(-candidates, kind='stable')[:self.beam_size]
+        parent, tag_index = np.divmod(best, len(tag_ids))
+        last_tags = tag_ids[tag_index]
+        return pairs[parent] % n_tags * n_tags + last_tags, candidates[best], parent, last_tags
+
 
 def load_tagger():
-    with open('pos_tagging/save.p', 'rb') as handle:
+    with open(resolve_path(MODEL_PATH), 'rb') as handle:
         m = pickle.load(handle)
     return m
+
+
+def _read_lines(path):
+    with open(path, encoding='utf-8', newline='\n') as in_file:
+        return in_file.read().split('\n')[:-1]
+
+
+def load_compiled_tagger():
+    """
+    Loads the export of export_tagger() when it exists, else compiles the pickled tagger
+    """
+    if os.path.exists(os.path.join(resolve_path(EXPORT_DIR), 'header.json')):
+        return CompiledTagger.load(resolve_path(EXPORT_DIR))
+    return CompiledTagger.from_tnt(load_tagger())
+
+
+def export_tagger(out_path=EXPORT_DIR):
+    """
+    One time export of the pickled tagger, compiled, to the binary layout of EXPORT_DIR, which
+    POSTagger loads instead of unpickling save.p once it exists
+    """
+    CompiledTagger.from_tnt(load_tagger()).save(resolve_path(out_path))
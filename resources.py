@@ -0,0 +1,74 @@
+import os
+import threading
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+# environment variable naming a directory with the model files, instead of the package directory
+MODEL_DIR_ENV = 'HINDINLTK_MODEL_DIR'
+
+_model_dir = None
+_resources = {}
+_lock = threading.Lock()
+# one lock per resource, so that loading one model doesn't hold up the accessors of the others
+_loading_locks = {}
+
+
+def set_model_dir(model_dir):
+    """
+    Makes resolve_path() look for the model files in model_dir, None goes back to the default.
+    The models loaded already are kept, see release().
+    """
+    global _model_dir
+    _model_dir = model_dir
+
+
+def get_model_dir():
+    if _model_dir is not None:
+        return _model_dir
+    return os.environ.get(MODEL_DIR_ENV, PACKAGE_DIR)
+
+
+def resolve_path(path):
+    """
+    Returns the location of a model file given relative to the model directory, e.g.
+    'pos_tagging/save.p'. Without a configured model directory, a file missing from the package
+    is still looked for relative to the current directory, where it used to be loaded from.
+    """
+    if os.path.isabs(path):
+        return path
+    resolved = os.path.join(get_model_dir(), path)
+    if _model_dir is None and MODEL_DIR_ENV not in os.environ and not os.path.exists(resolved) \
+            and os.path.exists(path):
+        return os.path.abspath(path)
+    return resolved
+
+
+def get_resource(key, loader):
+    """
+    Returns the resource stored under key, calling loader() to load it the first time only.
+    Safe to call from several threads: the other callers wait for the one loading it.
+    A resource is shared by the whole process, so it must not be modified by its users.
+    """
+    try:
+        return _resources[key]
+    except KeyError:
+        pass
+
+    with _lock:
+        loading_lock = _loading_locks.setdefault(key, threading.Lock())
+    with loading_lock:
+        if key not in _resources:
+            _resources[key] = loader()
+        return _resources[key]
+
+
+def release(key=None):
+    """
+    Forgets the resource stored under key, or all of them, so that the next access loads it again.
+    Resources with a close() method, like a tensorflow session, are closed.
+    """
+    with _lock:
+        keys = list(_resources) if key is None else [key]
+        released = [_resources.pop(k) for k in keys if k in _resources]
+    for resource in released:
+        if hasattr(resource, 'close'):
+            resource.close()
@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+# the suffixes stripped by the stemmer, by length
+SUFFIXES = {
+    1: [u"ो", u"े", u"ू", u"ु", u"ी", u"ि", u"ा"],
+    2: [u"कर", u"ाओ", u"िए", u"ाई", u"ाए", u"ने", u"नी", u"ना", u"ते", u"ीं", u"ती", u"ता", u"ाँ", u"ां", u"ों",
+        u"ें"],
+    3: [u"ाकर", u"ाइए", u"ाईं", u"ाया", u"ेगी", u"ेगा", u"ोगी", u"ोगे", u"ाने", u"ाना", u"ाते", u"ाती", u"ाता",
+        u"तीं", u"ाओं", u"ाएं", u"ुओं", u"ुएं", u"ुआं"],
+    4: [u"ाएगी", u"ाएगा", u"ाओगी", u"ाओगे", u"एंगी", u"ेंगी", u"एंगे", u"ेंगे", u"ूंगी", u"ूंगा", u"ातीं",
+        u"नाओं", u"नाएं", u"ताओं", u"ताएं", u"ियाँ", u"ियों", u"ियां"],
+    5: [u"ाएंगी", u"ाएंगे", u"ाऊंगी", u"ाऊंगा", u"ाइयाँ", u"ाइयों", u"ाइयां"],
+}
+
+# key of a trie node holding the length of the suffix ending there
+_END = ''
+
+
+class Stemmer:
+    """
+    Strips the longest of SUFFIXES from a word, keeping at least 2 characters of it.
+    The suffixes are compiled into a trie of their reversed characters, so that the longest one is
+    found by walking the word backwards once, and the stems of the most frequent words are cached.
+    """
+
+    def __init__(self, suffixes=None, cache_size=100000):
+        """
+        cache_size bounds the number of stemmed words kept in memory, 0 disables the cache
+        """
+        self._trie = _build_trie(suffixes if suffixes is not None else SUFFIXES)
+        self.stem = lru_cache(maxsize=cache_size)(self._stem) if cache_size > 0 else self._stem
+
+    def _stem(self, word):
+        node = self._trie
+        suffix_len = 0
+        # the stem keeps at least 2 characters
+        for i in range(len(word) - 1, 1, -1):
+            node = node.get(word[i])
+            if node is None:
+                break
+            suffix_len = node.get(_END, suffix_len)
+        return word[:-suffix_len] if suffix_len else word
+
+    def stem_list(self, tokens):
+        stem = self.stem
+        return [stem(token) for token in tokens]
+
+    def stem_dict(self, tokens):
+        '''returns a dictionary of stem words for each token'''
+        stem = self.stem
+        return {token: stem(token) for token in tokens}
+
+    def iter_stems(self, tokens):
+        """
+        Yields the stem of each token of an iterable, e.g. a token stream read from a file
+        """
+        stem = self.stem
+        for token in tokens:
+            yield stem(token)
+
+    def cache_info(self):
+        return self.stem.cache_info() if hasattr(self.stem, 'cache_info') else None
+
+
+def _build_trie(suffixes):
+    trie = {}
+    for suffix_len, suffix_list in suffixes.items():
+        for suffix in suffix_list:
+            node = trie
+            for c in reversed(suffix):
+                node = node.setdefault(c, {})
+            node[_END] = suffix_len
+    return trie
@@ -0,0 +1,135 @@
+from itertools import compress
+
+from HindiNLTK.resources import get_resource, resolve_path
+
+STOPWORDS_PATH = 'final_stopwords.txt'
+
+# key of a trie node marking the end of a multi-word stopword
+_END = None
+
+
+def load_stopwords(path=STOPWORDS_PATH):
+    """
+    Returns the stopwords of a file with one per line, the words of a multi-word one separated by spaces
+    """
+    with open(resolve_path(path), encoding='utf-8-sig') as in_file:
+        # a byte order mark is left in some lines
+        return [' '.join(line.replace('\ufeff', '').split()) for line in in_file if line.strip()]
+
+
+class StopwordFilter:
+    """
+    Removes stopwords from token lists. The single word stopwords are kept in a frozenset and the
+    multi-word ones, like 'के लिए', in a trie of their tokens, so that a phrase is removed when its
+    tokens follow each other. The tokens are read in one pass, at each one the longest stopword
+    starting there is removed (greedy longest match), else the token is kept.
+    """
+
+    def __init__(self, stopwords=None):
+        """
+        stopwords is a list of stopwords, final_stopwords.txt by default, which is read once per process
+        """
+        if stopwords is None:
+            stopwords = get_resource('stopwords', load_stopwords)
+        # every stopword, for `in` checks of single tokens or of whole phrases
+        self.words = frozenset(' '.join(stopword.split()) for stopword in stopwords)
+        self._trie = {}
+        self.max_phrase_len = 1
+        for stopword in self.words:
+            phrase = stopword.split()
+            if len(phrase) < 2:
+                continue
+            node = self._trie
+            for token in phrase:
+                node = node.setdefault(token, {})
+            node[_END] = True
+            self.max_phrase_len = max(self.max_phrase_len, len(phrase))
+
+    def __contains__(self, token):
+        return token in self.words
+
+    def starts_phrase(self, token):
+        """
+        Whether a multi-word stopword starts with token
+        """
+        return token in self._trie
+
+    def _match(self, tokens, start, end):
+        """
+        Returns the length of the longest multi-word stopword at tokens[start:end], 0 if none
+        """
+        node = self._trie
+        match_len = 0
+        for i in range(start, end):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _END in node:
+                match_len = i - start + 1
+        return match_len
+
+    def filter(self, tokens):
+        """
+        Returns the tokens which are not part of a stopword
+        """
+        if not isinstance(tokens, list):
+            tokens = list(tokens)
+        return self._filter(tokens, True)[0]
+
+    def _filter(self, tokens, final):
+        """
+        Returns the tokens kept and the number of tokens read. Unless final, more tokens follow, so
+        the last max_phrase_len - 1 ones are only read when in a stopword starting before them.
+        """
+        words = self.words
+        trie = self._trie
+        if trie.keys().isdisjoint(tokens):
+            # no multi-word stopword can start in tokens
+            return [token for token in tokens if token not in words], len(tokens)
+
+        limit = len(tokens) if final else max(len(tokens) - self.max_phrase_len + 1, 0)
+        keep = [token not in words for token in tokens[:limit]]
+        n_read = limit
+        # dropping the tokens of the multi-word stopwords, from the tokens which may start one
+        starts = [j for j, token in enumerate(tokens[:limit]) if token in trie]
+        for start, end in self.phrase_spans(tokens, starts):
+            keep[start:end] = [False] * (end - start)
+            n_read = max(n_read, end)
+        return list(compress(tokens, keep)), n_read
+
+    def phrase_spans(self, tokens, starts, stop=None):
+        """
+        Yields the (start, end) of the multi-word stopwords of tokens[:stop], matched as filter()
+        does from starts, the increasing positions of the tokens which may start one
+        """
+        trie = self._trie
+        stop = len(tokens) if stop is None else stop
+        end = 0
+        for start in starts:
+            # skipping a start inside the stopword matched before, or without the second word of one
+            if start < end or start >= stop - 1 or tokens[start + 1] not in trie[tokens[start]]:
+                continue
+            match_len = self._match(tokens, start, stop)
+            if match_len:
+                end = start + match_len
+                yield start, end
+
+    def filter_documents(self, documents):
+        """
+        filter() for a list of token lists
+        """
+        return [self.filter(tokens) for tokens in documents]
+
+    def iter_filter(self, tokens, chunk_size=10000):
+        """
+        filter() over an iterable of tokens, e.g. a token stream read from a file, yielding the tokens
+        kept chunk_size tokens at a time
+        """
+        pending = []
+        for token in tokens:
+            pending.append(token)
+            if len(pending) >= chunk_size:
+                filtered, n_read = self._filter(pending, False)
+                yield from filtered
+                pending = pending[n_read:]
+        yield from self._filter(pending, True)[0]
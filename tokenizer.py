@@ -1,20 +1,51 @@
+import multiprocessing
+import re
+from functools import lru_cache
 from typing import List
 
+import numpy as np
 import sentencepiece as spm
 
+from HindiNLTK.resources import get_resource, resolve_path
+
+MODEL_PATH = "tokenizer_model.model"
+# danda, double danda, the pipe typed for a danda, question and exclamation marks
+SENTENCE_TERMINATORS = '।॥|?!'
+
+_worker_tokenizer = None
+
+
+def _init_worker(model_path):
+    global _worker_tokenizer
+    _worker_tokenizer = Tokenizer(model_path)
+
+
+def _word_tokenize_chunk(texts):
+    return _worker_tokenizer.word_tokenize_batch(texts)
+
+
+def _encode_ids_chunk(texts):
+    return _worker_tokenizer.encode_ids_batch(texts)
+
+
+def _load_model(model_path):
+    sp = spm.SentencePieceProcessor()
+    sp.Load(model_path)
+    return sp
+
 
 class Tokenizer():
 
-    def __init__(self):
-        self.sp = spm.SentencePieceProcessor()
-        self.sp.Load("tokenizer_model.model")
+    def __init__(self, model_path=MODEL_PATH):
+        """
+        model_path is resolved by resources.resolve_path(). The SentencePiece model is loaded once
+        per process and shared by all the Tokenizers of that model.
+        """
+        self.model_path = resolve_path(model_path)
+        self.sp = get_resource(('tokenizer', self.model_path), lambda: _load_model(self.model_path))
 
     def tokenize_sentences(self, sents):
-        l = []
-        for sent in sents:
-            for word in sent:
-                l.append(self.word_tokenize(word))
-        return l
+        return self.word_tokenize_batch([word for sent in sents for word in sent])
 
     def word_tokenize(self, t: str) -> List[str]:
 
@@ -27,15 +58,101 @@ class Tokenizer():
                 q.append(a)
         return q
 
-    def sentence_tokenize(self, t: str):
-        sentences = []
-        sentence = ""
-        i = 0
-        for c in t:
-            if c == "।" or c == '|' and i > 0:
-                sentences.append(sentence)
-                sentence = ""
+    def word_tokenize_batch(self, texts: List[str], num_threads=None, processes=None,
+                            chunk_size=10000) -> List[List[str]]:
+        """
+        word_tokenize() for a list of texts, encoded by SentencePiece as one batch over num_threads
+        threads (all the cores by default). With processes, the list is cut into chunks of chunk_size
+        texts which a pool of that many processes tokenizes, for corpora too large for one process.
+        """
+        if processes is not None:
+            return self._map_chunks(_word_tokenize_chunk, texts, processes, chunk_size)
+
+        pieces = self.sp.Encode(list(texts), out_type=str, num_threads=num_threads)
+        return [[a[1:] if a[0] == '▁' else a for a in l] for l in pieces]
+
+    def encode_ids_batch(self, texts: List[str], num_threads=None, processes=None,
+                         chunk_size=10000) -> List[np.ndarray]:
+        """
+        The SentencePiece ids of the pieces of each text as an int32 array, for models which don't
+        need the piece strings. num_threads, processes and chunk_size as in word_tokenize_batch().
+        """
+        if processes is not None:
+            return self._map_chunks(_encode_ids_chunk, texts, processes, chunk_size)
+
+        ids = self.sp.Encode(list(texts), out_type=int, num_threads=num_threads)
+        return [np.array(l, dtype=np.int32) for l in ids]
+
+    def _map_chunks(self, fn, texts, processes, chunk_size):
+        texts = list(texts)
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+        results = []
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(self.model_path,)) as pool:
+            for result in pool.imap(fn, chunks):
+                results.extend(result)
+        return results
+
+    def sentence_spans(self, t: str, terminators=SENTENCE_TERMINATORS, split_period=True,
+                       include_terminators=False):
+        """
+        Yields the (start, end) character offsets of the sentences of t, in one linear regex pass
+        and without copying them. A sentence ends at a run of terminators (e.g. '।', '॥', '||', '?!'),
+        or at the end of the text. With split_period, a '.' is also a terminator when followed by a
+        space, another terminator or the end of the text, so that numbers like 3.5 stay whole.
+        The offsets leave out the whitespace around a sentence and, unless include_terminators,
+        its terminators; empty sentences are skipped.
+        """
+        group = 2 if include_terminators else 1
+        for mobj in _sentence_pattern(terminators, split_period).finditer(t):
+            yield mobj.start(1), mobj.end(group)
+
+    def sentence_tokenize(self, t: str, terminators=SENTENCE_TERMINATORS, split_period=True,
+                          include_terminators=False) -> List[str]:
+        return [t[start:end] for start, end in self.sentence_spans(t, terminators, split_period,
+                                                                   include_terminators)]
+
+    def sentence_tokenize_stream(self, chunks, terminators=SENTENCE_TERMINATORS, split_period=True,
+                                 include_terminators=False):
+        """
+        sentence_tokenize() over an iterable of pieces of a huge document (e.g. the lines of a file),
+        yielding the sentences as soon as they are complete, so only the current sentence is kept.
+        """
+        pattern = _sentence_pattern(terminators, split_period)
+        group = 2 if include_terminators else 1
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            last = None
+            for mobj in pattern.finditer(buffer):
+                if last is not None:
+                    yield buffer[last.start(1):last.end(group)]
+                last = mobj
+            # the last sentence may go on, or get more terminators, in the next chunk. Without any
+            # sentence, only a final '.' matters, which begins one if the next chunk goes on with text
+            if last is not None:
+                buffer = buffer[last.start(1):]
             else:
-                sentence += c
-            i += 1
-        return sentences
+                buffer = buffer[-1:] if buffer.endswith('.') else ''
+
+        for mobj in pattern.finditer(buffer):
+            yield buffer[mobj.start(1):mobj.end(group)]
+
+
+@lru_cache(maxsize=None)
+def _sentence_pattern(terminators, split_period):
+    """
+    group 1 is a sentence without its surrounding whitespace, group 2 ends after its terminators
+    """
+    t = re.escape(terminators)
+    if split_period:
+        period = r'\.(?=[\s.{t}]|\Z)'.format(t=t)
+        body_char = r'(?:[^{t}.\s]|\.(?![\s.{t}]|\Z))'.format(t=t)
+        any_char = r'(?:[^{t}.]|\.(?![\s.{t}]|\Z))'.format(t=t)
+        terminator = r'(?:[{t}]|{period})'.format(t=t, period=period)
+    else:
+        body_char = r'[^{t}\s]'.format(t=t)
+        any_char = r'[^{t}]'.format(t=t)
+        terminator = r'[{t}]'.format(t=t)
+    # the backtracking of the last body_char only goes over the whitespace ending a sentence
+    return re.compile(r'({body}(?:{any}*{body})?)(\s*{term}*)'.format(body=body_char, any=any_char,
+                                                                      term=terminator))
@@ -1,66 +1,395 @@
+import asyncio
+import os
 import pickle
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
 import tensorflow.compat.v1 as tf
 
-from HindiNLTK.tokenizer import Tokenizer
+from HindiNLTK.resources import get_resource, resolve_path
 
 tf.disable_v2_behavior()
 
+# inference only graph with the variables folded into constants, see export_frozen_graph()
+FROZEN_GRAPH_PATH = 'transliteration/frozen.pb'
+
 
 def _load_preprocess():
-    with open('transliteration/preprocess.p', mode='rb') as in_file:
+    with open(resolve_path('transliteration/preprocess.p'), mode='rb') as in_file:
         return pickle.load(in_file)
 
 
 def _load_params():
-    with open('transliteration/params.p', mode='rb') as in_file:
+    with open(resolve_path('transliteration/params.p'), mode='rb') as in_file:
         return pickle.load(in_file)
 
 
-class Transliterate:
+class _LRUCache:
+    """
+    Bounded in-memory cache of transliterated words, evicting the least recently used one
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.words = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, word):
+        if word in self.words:
+            self.words.move_to_end(word)
+            self.hits += 1
+            return self.words[word]
+        self.misses += 1
+        return None
+
+    def put(self, word, transliterated):
+        self.words[word] = transliterated
+        self.words.move_to_end(word)
+        if len(self.words) > self.max_size:
+            self.words.popitem(last=False)
+
+    def __len__(self):
+        return len(self.words)
+
+
+class _SqliteCache:
+    """
+    Persistent cache of transliterated words in a sqlite file. The file can be shared by several
+    processes, each opening its own connection: the WAL journal lets readers go on while one writes.
+    """
+
+    # max number of host parameters in a single statement of older sqlite versions
+    MAX_VARIABLES = 999
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS transliterations '
+                          '(word TEXT PRIMARY KEY, output TEXT NOT NULL)')
+        self.conn.commit()
+        self.hits = 0
+
+    def get_many(self, words):
+        found = {}
+        for start in range(0, len(words), self.MAX_VARIABLES):
+            chunk = words[start:start + self.MAX_VARIABLES]
+            query = 'SELECT word, output FROM transliterations WHERE word IN ({})'.format(','.join('?' * len(chunk)))
+            found.update(self.conn.execute(query, chunk))
+        self.hits += len(found)
+        return found
+
+    def put_many(self, transliterated):
+        with self.conn:
+            self.conn.executemany('INSERT OR IGNORE INTO transliterations VALUES (?, ?)', transliterated.items())
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM transliterations').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+class _TransliterationModel:
+    """
+    The vocabularies and the tensorflow session of the transliteration graph
+    """
 
     def __init__(self):
         self.load_path = _load_params()
+        # the predictions of the saved graph have a fixed batch dimension
         self.batch_size = 30
         _, (self.source_vocab_to_int, self.target_vocab_to_int), (
             self.source_int_to_vocab, self.target_int_to_vocab) = _load_preprocess()
+        self.eos_int = self.target_vocab_to_int['<EOS>']
+
+        # loading the graph and variables once, the session is kept for all the calls
+        self.graph = tf.Graph()
+        self.sess = tf.Session(graph=self.graph)
+        with self.graph.as_default():
+            if os.path.exists(resolve_path(FROZEN_GRAPH_PATH)):
+                tf.import_graph_def(_load_frozen_graph(), name='')
+            else:
+                loader = tf.train.import_meta_graph(resolve_path('transliteration/' + self.load_path + '.meta'))
+                loader.restore(self.sess, resolve_path('transliteration/' + self.load_path))
+
+        # providing placeholder names from the loaded graph
+        self.input_data = self.graph.get_tensor_by_name('input:0')
+        self.logits = self.graph.get_tensor_by_name('predictions:0')
+        self.target_sequence_length = self.graph.get_tensor_by_name('target_sequence_length:0')
+        self.keep_prob = self.graph.get_tensor_by_name('keep_prob:0')
+
+    def close(self):
+        self.sess.close()
+
+
+class Transliterate:
+
+    def __init__(self, cache_size=100000, cache_path=None):
+        """
+        cache_size bounds the number of transliterated words kept in memory, 0 disables the cache.
+        cache_path is an optional sqlite file keeping every transliterated word across runs, which
+        can be shared by worker processes as long as each one builds its own Transliterate.
+        The model is loaded once per process and shared by all the Transliterates, only the
+        caches belong to each one.
+        """
+        self.cache = _LRUCache(cache_size) if cache_size > 0 else None
+        self.disk_cache = _SqliteCache(cache_path) if cache_path is not None else None
+        # distinct words run through the model, found in neither cache
+        self.model_runs = 0
+        # the caches and model_runs are updated under this lock, so that a Transliterate can be used
+        # from several threads, e.g. directly and through an AsyncTransliterate. The model runs
+        # outside of it, the shared session being thread safe
+        self._lock = threading.Lock()
+
+        model = get_resource('transliteration', _TransliterationModel)
+        self.load_path = model.load_path
+        self.batch_size = model.batch_size
+        self.source_vocab_to_int = model.source_vocab_to_int
+        self.target_int_to_vocab = model.target_int_to_vocab
+        self.eos_int = model.eos_int
+        self.sess = model.sess
+        self.input_data = model.input_data
+        self.logits = model.logits
+        self.target_sequence_length = model.target_sequence_length
+        self.keep_prob = model.keep_prob
+
+    def close(self):
+        """
+        Closes the cache file. The shared session stays open, see resources.release()
+        """
+        if self.disk_cache is not None:
+            self.disk_cache.close()
 
-    # loading the saved parameters
+    def cache_info(self):
+        """
+        Returns the lookups of distinct words served by the in-memory cache (hits), by the cache
+        file (disk_hits) and by the model (misses), with the number of words in both caches
+        """
+        with self._lock:
+            return {
+                'hits': self.cache.hits if self.cache is not None else 0,
+                'disk_hits': self.disk_cache.hits if self.disk_cache is not None else 0,
+                'misses': self.model_runs,
+                'size': len(self.cache) if self.cache is not None else 0,
+                'disk_size': len(self.disk_cache) if self.disk_cache is not None else 0,
+            }
+
+    def warm_cache(self, words, chunk_size=10000):
+        """
+        Transliterates a word list, e.g. of the most frequent queries, only to fill the caches
+        """
+        words = list(words)
+        for start in range(0, len(words), chunk_size):
+            self.transliterate(words[start:start + chunk_size])
 
     def transliterate(self, transliterate_words):
-        # taking user input for prediction
-        # initialising the graph
-        words = []
-        loaded_graph = tf.Graph()
-
-        # initialising the session
-        with tf.Session(graph=loaded_graph) as sess:
-            # Load saved model
-            loader = tf.train.import_meta_graph('transliteration/'+self.load_path + '.meta')
-
-            # tf.train.Saver.restore(sess,load_path)
-            loader.restore(sess, 'transliteration/'+self.load_path)
-
-            # providing placeholder names from the loaded graph
-            input_data = loaded_graph.get_tensor_by_name('input:0')
-            logits = loaded_graph.get_tensor_by_name('predictions:0')
-            target_sequence_length = loaded_graph.get_tensor_by_name('target_sequence_length:0')
-            keep_prob = loaded_graph.get_tensor_by_name('keep_prob:0')
-
-            for transliterate_word in transliterate_words:
-                transliterate_word = _word_to_seq(transliterate_word, self.source_vocab_to_int)
-
-                # transliterating the given word
-                transliterate_logits = sess.run(logits, {input_data: [transliterate_word] * self.batch_size,
-                                                     target_sequence_length: [len(
-                                                         transliterate_word)] * self.batch_size,
-                                                     keep_prob: 1.0})[0]
-                # showing the output
-                output = ""
-                for i in transliterate_logits:
-                    if self.target_int_to_vocab[i] != '<EOS>':
-                        output = output + self.target_int_to_vocab[i]
-                words.append(output)
-            return words
+        """
+        Transliterates a list of romanized words, returning the Devanagari words in the same order.
+        Words found in the caches are not run again, the other distinct words are run together in
+        batches of words of the same length, see _length_buckets().
+        """
+        transliterated = {}
+        missing = []
+        with self._lock:
+            for transliterate_word in set(transliterate_words):
+                output = self.cache.get(transliterate_word) if self.cache is not None else None
+                if output is not None:
+                    transliterated[transliterate_word] = output
+                else:
+                    missing.append(transliterate_word)
+
+            if missing and self.disk_cache is not None:
+                stored = self.disk_cache.get_many(missing)
+                transliterated.update(stored)
+                missing = [transliterate_word for transliterate_word in missing if transliterate_word not in stored]
+                self._cache_words(stored)
+            self.model_runs += len(missing)
+
+        predicted = self._predict(missing)
+        transliterated.update(predicted)
+        with self._lock:
+            self._cache_words(predicted)
+            if predicted and self.disk_cache is not None:
+                self.disk_cache.put_many(predicted)
+
+        return [transliterated[transliterate_word] for transliterate_word in transliterate_words]
+
+    def _cache_words(self, transliterated):
+        if self.cache is not None:
+            for transliterate_word, output in transliterated.items():
+                self.cache.put(transliterate_word, output)
+
+    def _predict(self, transliterate_words):
+        transliterated = {}
+        for length, batch in _length_buckets(transliterate_words, self.batch_size):
+            for transliterate_word, output in zip(batch, self._transliterate_batch(batch, length)):
+                transliterated[transliterate_word] = output
+        return transliterated
+
+    def _transliterate_batch(self, batch, length):
+        seqs = [_word_to_seq(transliterate_word, self.source_vocab_to_int) for transliterate_word in batch]
+        # filling up the fixed batch dimension, the extra rows are thrown away
+        seqs += [seqs[-1]] * (self.batch_size - len(seqs))
+
+        transliterate_logits = self.sess.run(self.logits, {self.input_data: seqs,
+                                                           self.target_sequence_length: [length] * self.batch_size,
+                                                           self.keep_prob: 1.0})
+        outputs = []
+        for row in transliterate_logits[:len(batch)]:
+            # a row that ends before the others is padded after its <EOS>
+            output = ""
+            for i in row:
+                if i == self.eos_int:
+                    break
+                output = output + self.target_int_to_vocab[i]
+            outputs.append(output)
+        return outputs
+
+
+class AsyncTransliterate:
+    """
+    asyncio front end of a Transliterate. The words of the requests made by concurrent coroutines
+    within batch_window seconds are collected into one micro-batch, which a dedicated worker thread
+    transliterates without blocking the event loop, before each caller gets its own words back.
+    A micro-batch is sent early once it holds max_batch_words words.
+    """
+
+    def __init__(self, transliterator=None, batch_window=0.005, max_batch_words=1024):
+        self.owns_transliterator = transliterator is None
+        self.transliterator = transliterator if transliterator is not None else Transliterate()
+        self.batch_window = batch_window
+        self.max_batch_words = max_batch_words
+        # a single thread, so that the micro-batches run one at a time and in order, each one as large
+        # as the requests allow. The Transliterate locks its caches, so it may be used elsewhere too
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='transliterate')
+
+        self._pending = []
+        self._pending_words = 0
+        self._flush_handle = None
+
+        self.in_flight_batches = 0
+        self.batches = 0
+        self.requests = 0
+        self.words = 0
+        self.max_batch_size = 0
+
+    async def transliterate(self, transliterate_words):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        transliterate_words = list(transliterate_words)
+        self._pending.append((transliterate_words, future))
+        self._pending_words += len(transliterate_words)
+
+        if self._pending_words >= self.max_batch_words:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush, loop)
+        return await future
+
+    def _flush(self, loop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending = self._pending
+        self._pending = []
+        self._pending_words = 0
+
+        batch = [transliterate_word for transliterate_words, _ in pending for transliterate_word in transliterate_words]
+        self.in_flight_batches += 1
+        self.batches += 1
+        self.requests += len(pending)
+        self.words += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+
+        task = loop.run_in_executor(self.executor, self.transliterator.transliterate, batch)
+        task.add_done_callback(lambda done: self._resolve(pending, done))
+
+    def _resolve(self, pending, done):
+        self.in_flight_batches -= 1
+        if done.exception() is not None:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(done.exception())
+            return
+
+        transliterated = done.result()
+        start = 0
+        for transliterate_words, future in pending:
+            end = start + len(transliterate_words)
+            # the caller may have been cancelled while the batch ran
+            if not future.done():
+                future.set_result(transliterated[start:end])
+            start = end
+
+    def metrics(self):
+        """
+        Returns the requests and words waiting for the current micro-batch (queue_depth, queued_words),
+        the micro-batches sent to the worker thread but not done yet (in_flight_batches), and totals
+        of the requests, words and micro-batches so far, with the mean and max micro-batch size in words
+        """
+        return {
+            'queue_depth': len(self._pending),
+            'queued_words': self._pending_words,
+            'in_flight_batches': self.in_flight_batches,
+            'requests': self.requests,
+            'words': self.words,
+            'batches': self.batches,
+            'mean_batch_size': self.words / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.owns_transliterator:
+            self.transliterator.close()
+
+
+def _load_frozen_graph():
+    graph_def = tf.GraphDef()
+    with open(resolve_path(FROZEN_GRAPH_PATH), mode='rb') as in_file:
+        graph_def.ParseFromString(in_file.read())
+    return graph_def
+
+
+def export_frozen_graph():
+    """
+    One time export of the checkpoint to a frozen inference graph: only the ops from the input,
+    target_sequence_length and keep_prob placeholders to the predictions are kept, with the
+    variables turned into constants. It is written to FROZEN_GRAPH_PATH, in the model directory of
+    resources.resolve_path(), where Transliterate loads it instead of the checkpoint once it exists.
+    """
+    load_path = _load_params()
+    graph = tf.Graph()
+    with tf.Session(graph=graph) as sess:
+        loader = tf.train.import_meta_graph(resolve_path('transliteration/' + load_path + '.meta'),
+                                            clear_devices=True)
+        loader.restore(sess, resolve_path('transliteration/' + load_path))
+        frozen = tf.graph_util.convert_variables_to_constants(sess, graph.as_graph_def(), ['predictions'])
+
+    with open(resolve_path(FROZEN_GRAPH_PATH), mode='wb') as out_file:
+        out_file.write(frozen.SerializeToString())
+
+
+def _length_buckets(words, batch_size):
+    """
+    Schedules words into batches of at most batch_size words of the same length, shortest first.
+    The encoder reads the padding of a shorter word and the decoder runs up to the longest target
+    length of the batch, so mixing lengths would both waste steps on padding and give other words
+    than a word run alone. Yields (length, batch) tuples.
+    """
+    buckets = defaultdict(list)
+    for word in words:
+        buckets[len(word)].append(word)
+
+    for length in sorted(buckets):
+        bucket = buckets[length]
+        for start in range(0, len(bucket), batch_size):
+            yield length, bucket[start:start + batch_size]
+
 
 # converting the words to vectors of integers
 def _word_to_seq(word, vocab_to_int):
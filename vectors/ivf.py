@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted file index for approximate cosine nearest neighbours over a vector matrix.
+    The unit vectors are clustered by spherical k-means into n_lists lists, and a query only scores
+    the rows of the n_probe lists whose centroids are the most similar to it, instead of all of them.
+    The index keeps the row ids grouped by list, the matrix itself stays where it is (e.g. memory mapped).
+    """
+
+    def __init__(self, centroids, order, offsets, fingerprint=''):
+        """
+        fingerprint identifies the matrix the index was built on, e.g. a hash of its vocabulary,
+        and is saved with it, see matches()
+        """
+        self.centroids = centroids
+        # the row ids of list i are order[offsets[i]:offsets[i + 1]]
+        self.order = order
+        self.offsets = offsets
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, vectors, norms, n_lists=None, n_iter=10, sample_size=100000, chunk_size=16384, seed=0,
+              fingerprint=''):
+        """
+        Clusters a sample of the rows of vectors, then assigns every row to its closest centroid.
+        n_lists defaults to 4 * sqrt(number of rows).
+        """
+        rng = np.random.default_rng(seed)
+        n_rows = vectors.shape[0]
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+        norms = np.where(norms > 0, norms, 1).astype(np.float32)
+
+        sample_ids = np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))
+        sample = vectors[sample_ids].astype(np.float32) / norms[sample_ids, np.newaxis]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+
+        for _ in range(n_iter):
+            assignment = _closest(sample, centroids, chunk_size)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # an empty list starts again from a random sample row
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+
+        assignment = np.empty(n_rows, dtype=np.int32)
+        for start in range(0, n_rows, chunk_size):
+            rows = vectors[start:start + chunk_size].astype(np.float32) / norms[start:start + chunk_size, np.newaxis]
+            assignment[start:start + chunk_size] = _closest(rows, centroids, chunk_size)
+
+        order = np.argsort(assignment, kind='stable').astype(np.int32)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assignment, minlength=n_lists))
+        return cls(centroids.astype(np.float32), order, offsets, fingerprint)
+
+    def save(self, path):
+        with open(path, 'wb') as out_file:
+            np.savez(out_file, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                     n_rows=np.int64(len(self.order)), fingerprint=np.str_(self.fingerprint))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            # an index saved without its fingerprint matches no matrix
+            fingerprint = str(arrays['fingerprint']) if 'fingerprint' in arrays.files else None
+            return cls(arrays['centroids'], arrays['order'], arrays['offsets'], fingerprint)
+
+    def matches(self, n_rows, fingerprint):
+        """
+        Whether the index was built on a matrix of n_rows rows with that fingerprint, its row ids
+        are wrong for any other one
+        """
+        return len(self.order) == n_rows and self.fingerprint is not None and self.fingerprint == fingerprint
+
+    def search(self, vectors, norms, query, topn=10, n_probe=16, exclude=None):
+        """
+        Returns the row ids and cosine similarities of the (approximately) topn rows of vectors most
+        similar to query, best first, leaving out the row id exclude
+        """
+        query = query.astype(np.float32) / max(float(np.linalg.norm(query)), 1e-12)
+        n_probe = min(n_probe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        candidates = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        if len(candidates) == 0:
+            return candidates, np.zeros(0, dtype=np.float32)
+
+        # gathering in row order keeps the reads of a memory mapped matrix sequential
+        candidates.sort()
+        scores = (vectors[candidates] @ query) / np.where(norms[candidates] > 0, norms[candidates], 1)
+        n_best = min(topn, len(candidates))
+        best = np.argpartition(-scores, n_best - 1)[:n_best]
+        best = best[np.argsort(-scores[best])]
+        return candidates[best], scores[best]
+
+
+def _closest(rows, centroids, chunk_size):
+    assignment = np.empty(len(rows), dtype=np.int32)
+    for start in range(0, len(rows), chunk_size):
+        assignment[start:start + chunk_size] = np.argmax(rows[start:start + chunk_size] @ centroids.T, axis=1)
+    return assignment
@@ -1,12 +1,502 @@
+import hashlib
+import os
+from functools import lru_cache
+
 import gensim
+import numpy as np
+
+from HindiNLTK.resources import get_resource, resolve_path
+from HindiNLTK.vectors.ivf import IVFIndex
+
+VEC_PATH = "vectors/wiki.hi.vec"
+# binary layout written by convert_vectors(): the matrix as .npy and one word per line
+MATRIX_PATH = "vectors/wiki.hi.npy"
+VOCAB_PATH = "vectors/wiki.hi.vocab"
+# per row scales of a matrix quantized to int8 by convert_vectors()
+SCALES_PATH = "vectors/wiki.hi.scales.npy"
+# approximate nearest neighbour index of Vectorizer.build_ann_index()
+ANN_INDEX_PATH = "vectors/wiki.hi.ivf.npz"
+
 
 class Vectorizer:
 
-    def __init__(self):
-        self.__vector_model = gensim.models.KeyedVectors.load_word2vec_format("vectors/wiki.hi.vec", binary=False)
+    # shortest character n-gram used to synthesize the vector of an unknown word
+    MIN_NGRAM = 2
+    # rows of a float16 or int8 matrix converted to float32 at a time when scoring the whole matrix,
+    # into one block reused for the whole matrix and small enough to stay in the CPU cache
+    ROW_CHUNK_SIZE = 2048
+    # max number of float32 scores, queries x vocabulary, of a chunk of get_most_similar_batch() (64 MB)
+    MAX_CHUNK_SCORES = 1 << 24
+
+    def __init__(self, oov_cache_size=100000, tokenizer=None, vocab=None, limit=None, lazy=False):
+        """
+        Opens the binary vectors of convert_vectors() when they exist, memory mapped so that
+        the worker processes share one page cached copy, else parses the text vectors.
+        oov_cache_size bounds the number of synthesized vectors of unknown words kept in memory.
+        With a Tokenizer, unknown words are first composed from their SentencePiece pieces.
+
+        vocab (an allow-list of words) and limit (the first, most frequent, limit words) restrict the
+        vectors kept in memory to those words, reading the text vectors in one pass. With lazy, the
+        vector of any other word is read from the file the first time it is asked for, through an
+        index of the offsets of its rows, so memory grows with the words actually used.
+        The similarity searches only consider the words kept so far.
+        The whole vectors are loaded once per process and shared, the restricted ones are not.
+        """
+        self.tokenizer = tokenizer
+        self.__synthesize_vector = lru_cache(maxsize=oov_cache_size)(self._synthesize_vector)
+        self.__lazy_rows = None
+        # with lazy loading, the matrix is a view of the filled rows of this buffer, see _load_lazy_rows()
+        self.__lazy_buffer = None
+        self.__restricted = vocab is not None or limit is not None or lazy
+        self.__ann_index = None
+
+        if not self.__restricted:
+            # the whole vectors are loaded once per process and shared by all the Vectorizers,
+            # with their ANN index
+            self.__shared = get_resource('vectors', _load_vectors)
+            self.__vector_model, self.__scales = self.__shared.model, self.__shared.scales
+            return
+        self.__shared = None
+
+        # the restricted vectors are a float32 copy, whatever the storage mode, and the row ids of
+        # the ANN index of the whole vocabulary don't apply to them
+        vocab = set(vocab) if vocab is not None else None
+        if _has_binary_vectors():
+            matrix_rows = _MatrixRows(resolve_path(MATRIX_PATH), resolve_path(VOCAB_PATH))
+            words = _restrict(matrix_rows.model.index_to_key, vocab, limit)
+            self.__vector_model = _keyed_vectors(words, matrix_rows.get(words), matrix_rows.model.vector_size)
+            rows = matrix_rows
+        else:
+            self.__vector_model, rows = _load_text_vectors(resolve_path(VEC_PATH), vocab, limit, lazy)
+        self.__lazy_rows = rows if lazy else None
+        self.__scales = None
+
+    def build_ann_index(self, n_lists=None, path=None):
+        """
+        Builds the approximate nearest neighbour index used by get_most_similar(approximate=True)
+        and saves it next to the vectors, where the Vectorizers of the next processes find it.
+        The index of the whole vectors is used at once by all the Vectorizers sharing them.
+        The index of restricted or lazy vectors, whose row ids are not those of the whole vectors,
+        is only saved to an explicit path.
+        """
+        if path is None:
+            if self.__restricted:
+                raise ValueError("The index of restricted or lazy vectors needs its own path")
+            path = ANN_INDEX_PATH
+        model = self.__vector_model
+        self._fill_norms()
+        ann_index = IVFIndex.build(model.vectors, model.norms, n_lists=n_lists,
+                                   fingerprint=vocab_fingerprint(model.index_to_key))
+        ann_index.save(resolve_path(path))
+        if self.__shared is not None:
+            self.__shared.ann_index = ann_index
+        else:
+            self.__ann_index = ann_index
+
+    def get_most_similar(self, word, topn=10, approximate=False, n_probe=16):
+        """
+        Returns the topn most similar words by cosine similarity. With approximate, only the
+        n_probe lists of the ANN index closest to the word are searched, see build_ann_index()
+        The exact search of float16 or int8 vectors converts every row to float32 for each query:
+        int8 is a little slower than float32, float16 several times slower, as numpy converts it
+        without vector instructions. The approximate search only converts the rows it probes.
+        """
+        self._load_lazy_rows([word])
+        if not approximate:
+            if self.__vector_model.vectors.dtype != np.float32:
+                # gensim would convert the whole quantized matrix to float32 for every query
+                return self.get_most_similar_batch([word], topn=topn)[0]
+            self._fill_norms()
+            return self.__vector_model.most_similar(word, topn=topn)
+        ann_index = self.__shared.ann_index if self.__shared is not None else self.__ann_index
+        if ann_index is None:
+            raise ValueError("No ANN index of these vectors, see Vectorizer.build_ann_index()")
+
+        model = self.__vector_model
+        self._fill_norms()
+        index = model.get_index(word)
+        ids, scores = ann_index.search(model.vectors, model.norms, model.vectors[index], topn=topn,
+                                       n_probe=n_probe, exclude=index)
+        return [(model.index_to_key[i], float(score)) for i, score in zip(ids, scores)]
+
+    def _load_lazy_rows(self, words):
+        """
+        Adds the vectors of the words which are not loaded yet but in the file, with lazy loading.
+        The rows are appended to a buffer whose capacity doubles when it is full, as gensim's
+        add_vectors() would copy the whole matrix for every word.
+        """
+        if self.__lazy_rows is None:
+            return
+        model = self.__vector_model
+        missing = [word for word in dict.fromkeys(words)
+                   if word not in model.key_to_index and word in self.__lazy_rows]
+        if not missing:
+            return
+
+        start = len(model.index_to_key)
+        end = start + len(missing)
+        if self.__lazy_buffer is None or end > len(self.__lazy_buffer):
+            capacity = max(2 * start, end)
+            buffer = np.empty((capacity, model.vector_size), dtype=np.float32)
+            buffer[:start] = model.vectors
+            self.__lazy_buffer = buffer
+        self.__lazy_buffer[start:end] = self.__lazy_rows.get(missing)
+        model.key_to_index.update(zip(missing, range(start, end)))
+        model.index_to_key.extend(missing)
+        model.vectors = self.__lazy_buffer[:end]
+        # the norms of the rows before are recomputed with the new ones, see _fill_norms()
+        model.norms = None
+
+    def get_vector(self, word, synthesize=False):
+        """
+        Returns the vector of a word. An unknown word raises a KeyError, unless synthesize is set,
+        in which case it gets the vector composed from its subwords, see _synthesize_vector().
+        """
+        self._load_lazy_rows([word])
+        if synthesize and word not in self.__vector_model.key_to_index:
+            return self.__synthesize_vector(word)
+        return self._float32_rows(self.__vector_model.get_index(word))
+
+    def _float32_rows(self, indices):
+        """
+        The float32 rows of the matrix at an index or a list of indices, dequantized if int8
+        """
+        rows = self.__vector_model.vectors[indices]
+        if self.__scales is None:
+            return rows.astype(np.float32, copy=False)
+        scales = self.__scales[indices]
+        if np.ndim(scales) > 0:
+            scales = scales[:, np.newaxis]
+        return rows.astype(np.float32) * scales
+
+    def _float32_blocks(self):
+        """
+        Yields the start and the float32 copy of each block of ROW_CHUNK_SIZE rows of a float16 or
+        int8 matrix, unscaled, all copied into the same buffer
+        """
+        vectors = self.__vector_model.vectors
+        block = np.empty((min(self.ROW_CHUNK_SIZE, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(vectors), self.ROW_CHUNK_SIZE):
+            rows = vectors[start:start + self.ROW_CHUNK_SIZE]
+            np.copyto(block[:len(rows)], rows)
+            yield start, block[:len(rows)]
+
+    def _fill_norms(self):
+        """
+        Computes the norms of the rows once, by chunks so that a float16 or int8 matrix is never
+        converted to float32 at once. The norms of an int8 matrix are those of the unscaled rows.
+        """
+        model = self.__vector_model
+        if model.norms is not None and len(model.norms) == len(model.vectors):
+            return
+        if model.vectors.dtype == np.float32:
+            model.fill_norms()
+            return
+        norms = np.empty(len(model.vectors), dtype=np.float32)
+        for start, rows in self._float32_blocks():
+            norms[start:start + len(rows)] = np.linalg.norm(rows, axis=1)
+        model.norms = norms
+
+    def _dot_all(self, queries):
+        """
+        The dot products of float32 query rows with every row of the matrix, computed directly
+        on the float16 or int8 data chunk by chunk
+        """
+        vectors = self.__vector_model.vectors
+        if vectors.dtype == np.float32:
+            return queries @ vectors.T
+
+        scores = np.empty((len(queries), len(vectors)), dtype=np.float32)
+        for start, rows in self._float32_blocks():
+            scores[:, start:start + len(rows)] = queries @ rows.T
+        return scores
+
+    def _synthesize_vector(self, word):
+        """
+        Composes the vector of an unknown word, e.g. an inflected form, from the vectors of its
+        SentencePiece pieces found in the vocabulary, if a Tokenizer was given, else from those of
+        its character n-grams of at least MIN_NGRAM characters found in the vocabulary, weighted by
+        their length. With lazy loading, the vocabulary includes the words of the file not read yet.
+        A word without any of them gets a zero vector. The results are memoized.
+        """
+        key_to_index = self.__vector_model.key_to_index
+
+        indices = []
+        weights = []
+        if self.tokenizer is not None:
+            pieces = self.tokenizer.word_tokenize(word)
+            # with lazy loading, the rows of the pieces and n-grams in the file are read first
+            self._load_lazy_rows(pieces)
+            for piece in pieces:
+                if piece in key_to_index:
+                    indices.append(key_to_index[piece])
+                    weights.append(len(piece))
+
+        if not indices:
+            ngrams = [(word[start:start + n], n) for n in range(len(word) - 1, self.MIN_NGRAM - 1, -1)
+                      for start in range(len(word) - n + 1)]
+            self._load_lazy_rows([ngram for ngram, _ in ngrams])
+            for ngram, n in ngrams:
+                index = key_to_index.get(ngram)
+                if index is not None:
+                    indices.append(index)
+                    weights.append(n)
+
+        if not indices:
+            vector = np.zeros(self.__vector_model.vector_size, dtype=np.float32)
+        else:
+            weights = np.array(weights, dtype=np.float32)
+            vector = weights @ self._float32_rows(indices) / weights.sum()
+        # the same array is handed out on every hit of the cache
+        vector.setflags(write=False)
+        return vector
+
+    def get_vectors(self, words, oov='raise'):
+        """
+        Returns the vectors of a list of words (e.g. the tokens of a text) as a 2-D array, one row
+        per word. oov sets what an unknown word gets: 'raise' a KeyError, 'zeros' or 'nan' a row
+        filled with them, or 'synthesize' its vector composed from its subwords.
+        """
+        if oov not in ('raise', 'zeros', 'nan', 'synthesize'):
+            raise ValueError("oov must be one of 'raise', 'zeros', 'nan', 'synthesize'")
+
+        self._load_lazy_rows(words)
+        key_to_index = self.__vector_model.key_to_index
+        indices = [key_to_index.get(word, -1) for word in words]
+        if oov == 'raise':
+            for word, index in zip(words, indices):
+                if index < 0:
+                    raise KeyError("Key '{}' not present".format(word))
+            return self._float32_rows(indices)
+
+        found = np.array([index >= 0 for index in indices], dtype=bool)
+        result = np.full((len(indices), self.__vector_model.vector_size), np.nan if oov == 'nan' else 0,
+                         dtype=np.float32)
+        result[found] = self._float32_rows([index for index in indices if index >= 0])
+        if oov == 'synthesize':
+            for row, (word, index) in enumerate(zip(words, indices)):
+                if index < 0:
+                    result[row] = self.__synthesize_vector(word)
+        return result
+
+    def get_most_similar_batch(self, words, topn=10, chunk_size=None):
+        """
+        get_most_similar() for many words at once: returns for each word its topn most similar words
+        by cosine similarity, as lists of (word, similarity) like gensim's most_similar.
+        The query vectors are normalized and scored against the whole vocabulary with one matrix
+        product per chunk_size queries, divided by the vector norms rather than by normalizing the
+        matrix, which would copy it out of the shared memory map. chunk_size defaults to at most 256
+        queries whose scores fit in MAX_CHUNK_SCORES.
+        """
+        self._load_lazy_rows(words)
+        model = self.__vector_model
+        self._fill_norms()
+        vectors = model.vectors
+        norms = model.norms
+        query_indices = [model.get_index(word) for word in words]
+        if chunk_size is None:
+            chunk_size = max(1, min(256, self.MAX_CHUNK_SCORES // max(len(vectors), 1)))
+
+        results = []
+        for start in range(0, len(query_indices), chunk_size):
+            chunk = query_indices[start:start + chunk_size]
+            queries = vectors[chunk].astype(np.float32, copy=False) / norms[chunk, np.newaxis]
+            scores = self._dot_all(queries)
+            scores /= norms
+            # negated in place, so that the best are the smallest without a copy of the scores
+            np.negative(scores, out=scores)
+            # the query word itself is excluded, so one more candidate is kept
+            n_best = min(topn + 1, scores.shape[1])
+            for row, query_index in enumerate(chunk):
+                # row by row, as the indices of a whole chunk would take twice the memory of its scores
+                best = np.argpartition(scores[row], n_best - 1)[:n_best]
+                candidates = best[np.argsort(scores[row, best])]
+                results.append([(model.index_to_key[i], -float(scores[row, i]))
+                                for i in candidates if i != query_index][:topn])
+            # freed before the scores of the next chunk are allocated
+            del scores
+        return results
+
+
+def convert_vectors(vec_path=VEC_PATH, matrix_path=MATRIX_PATH, vocab_path=VOCAB_PATH, dtype=np.float32,
+                    scales_path=SCALES_PATH):
+    """
+    One time conversion of the text vectors to a float32 matrix in a .npy file and a vocabulary file
+    with the word of each row, which Vectorizer loads with mmap in seconds.
+    A dtype of float16 halves the memory, int8 quarters it: each row is then divided by a scale,
+    its max absolute value / 127, and rounded, and the scales are saved to scales_path.
+    Vectorizer hands out float32 vectors whatever the dtype.
+    """
+    vec_path, matrix_path, vocab_path, scales_path = (resolve_path(path) for path in
+                                                      (vec_path, matrix_path, vocab_path, scales_path))
+    model = gensim.models.KeyedVectors.load_word2vec_format(vec_path, binary=False)
+    if np.dtype(dtype) == np.int8:
+        quantized, scales = quantize_int8(model.vectors)
+        np.save(scales_path, scales)
+        np.save(matrix_path, quantized)
+    else:
+        np.save(matrix_path, model.vectors.astype(dtype, copy=False))
+    with open(vocab_path, 'w', encoding='utf-8', newline='\n') as out_file:
+        for word in model.index_to_key:
+            out_file.write(word + '\n')
+
+
+def quantize_int8(vectors):
+    """
+    Returns the rows of vectors divided by their max absolute value / 127 and rounded to int8,
+    with those float32 scales
+    """
+    scales = np.abs(vectors).max(axis=1).astype(np.float32) / 127
+    scales[scales == 0] = 1
+    return np.round(vectors / scales[:, np.newaxis]).astype(np.int8), scales
+
+
+def _has_binary_vectors():
+    return os.path.exists(resolve_path(MATRIX_PATH)) and os.path.exists(resolve_path(VOCAB_PATH))
+
+
+class _SharedVectors:
+    """
+    The whole vectors shared by the Vectorizers of a process, with their int8 scales and ANN index,
+    when there are any. The index is replaced by Vectorizer.build_ann_index().
+    """
+
+    def __init__(self, model, scales, ann_index):
+        self.model = model
+        self.scales = scales
+        self.ann_index = ann_index
+
+
+def _load_vectors():
+    """
+    Returns the _SharedVectors of the whole vectors
+    """
+    if _has_binary_vectors():
+        model = _load_binary_vectors(resolve_path(MATRIX_PATH), resolve_path(VOCAB_PATH))
+    else:
+        model = gensim.models.KeyedVectors.load_word2vec_format(resolve_path(VEC_PATH), binary=False)
+    # an int8 matrix keeps the rows divided by their scale. The cosine similarities don't depend on
+    # the scale of a row, so only the vectors handed out are multiplied back
+    scales = np.load(resolve_path(SCALES_PATH)) if model.vectors.dtype == np.int8 else None
+    ann_index_path = resolve_path(ANN_INDEX_PATH)
+    ann_index = IVFIndex.load(ann_index_path) if os.path.exists(ann_index_path) else None
+    if ann_index is not None and not ann_index.matches(len(model.vectors), vocab_fingerprint(model.index_to_key)):
+        # built on other vectors, e.g. before convert_vectors() was run again, the index is rebuilt
+        # with build_ann_index()
+        ann_index = None
+    return _SharedVectors(model, scales, ann_index)
+
+
+def vocab_fingerprint(words):
+    """
+    A hash of the words of the rows of a matrix, identifying the matrix an ANN index was built on
+    """
+    return hashlib.sha1('\n'.join(words).encode('utf-8')).hexdigest()
+
+
+class _TextRows:
+    """
+    Reads rows of the text vectors on demand, from the byte offsets of their lines
+    """
+
+    def __init__(self, path, offsets, vector_size):
+        self.path = path
+        self.offsets = offsets
+        self.vector_size = vector_size
+
+    def __contains__(self, word):
+        return word in self.offsets
+
+    def get(self, words):
+        rows = np.empty((len(words), self.vector_size), dtype=np.float32)
+        with open(self.path, 'rb') as in_file:
+            for i, word in enumerate(words):
+                in_file.seek(self.offsets[word])
+                _, rows[i] = _parse_vector_line(in_file.readline(), self.vector_size)
+        return rows
+
+
+class _MatrixRows:
+    """
+    Reads rows of the memory mapped binary vectors as float32, dequantizing an int8 matrix
+    """
+
+    def __init__(self, matrix_path, vocab_path):
+        self.model = _load_binary_vectors(matrix_path, vocab_path)
+        self.scales = np.load(resolve_path(SCALES_PATH)) if self.model.vectors.dtype == np.int8 else None
+
+    def __contains__(self, word):
+        return word in self.model.key_to_index
+
+    def get(self, words):
+        indices = [self.model.key_to_index[word] for word in words]
+        rows = self.model.vectors[indices].astype(np.float32)
+        if self.scales is not None:
+            rows *= self.scales[indices, np.newaxis]
+        return rows
+
+
+def _restrict(words, vocab, limit):
+    return [word for i, word in enumerate(words)
+            if (limit is not None and i < limit) or (vocab is not None and word in vocab)]
+
+
+def _keyed_vectors(words, vectors, vector_size):
+    model = gensim.models.KeyedVectors(vector_size, count=0, dtype=np.float32)
+    if words:
+        model.add_vectors(words, vectors)
+    return model
+
+
+def _parse_vector_line(line, vector_size):
+    # the same split as gensim's load_word2vec_format
+    parts = line.decode('utf-8').rstrip().split(' ')
+    if len(parts) != vector_size + 1:
+        raise ValueError("invalid vector on line {!r}".format(line[:50]))
+    return parts[0], np.array(parts[1:], dtype=np.float64).astype(np.float32)
+
+
+def _load_text_vectors(vec_path, vocab, limit, lazy):
+    """
+    Reads the text vectors in one pass, keeping only the rows of the words in vocab or among the
+    first limit ones, and, with lazy, the byte offsets of the lines of the others
+    """
+    words = []
+    kept = set()
+    rows = []
+    offsets = {}
+    with open(vec_path, 'rb') as in_file:
+        header = in_file.readline()
+        vector_size = int(header.split()[1])
+        offset = len(header)
+        for i, line in enumerate(in_file):
+            word = line[:line.index(b' ')].decode('utf-8')
+            if word in offsets or word in kept:
+                # gensim keeps the first row of a duplicated word
+                pass
+            elif (limit is not None and i < limit) or (vocab is not None and word in vocab):
+                word, row = _parse_vector_line(line, vector_size)
+                words.append(word)
+                kept.add(word)
+                rows.append(row)
+            elif lazy:
+                offsets[word] = offset
+            elif vocab is None:
+                # only the first limit rows are needed
+                break
+            offset += len(line)
+
+    vectors = np.array(rows, dtype=np.float32).reshape(len(rows), vector_size)
+    return _keyed_vectors(words, vectors, vector_size), _TextRows(vec_path, offsets, vector_size)
+
 
-    def get_most_similar(self, word):
-        return self.__vector_model.most_similar(word)
+def _load_binary_vectors(matrix_path, vocab_path):
+    vectors = np.load(matrix_path, mmap_mode='r')
+    with open(vocab_path, encoding='utf-8', newline='\n') as in_file:
+        words = in_file.read().split('\n')[:-1]
 
-    def get_vector(self, word):
-        return self.__vector_model.get_vector(word)
+    model = gensim.models.KeyedVectors(vectors.shape[1], count=0, dtype=vectors.dtype)
+    model.vectors = vectors
+    model.index_to_key = words
+    model.key_to_index = {word: i for i, word in enumerate(words)}
+    return model
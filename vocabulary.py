@@ -0,0 +1,150 @@
+from itertools import chain, islice
+
+import numpy as np
+
+from HindiNLTK.resources import get_resource
+from HindiNLTK.stemmer import Stemmer
+from HindiNLTK.stopwords import StopwordFilter
+
+
+class Vocabulary:
+    """
+    Interns tokens to integer ids, and computes the stem and the stopword flags of each word type
+    once, the first time it is seen. Documents are then processed as NumPy arrays of ids, the
+    stopwords being dropped with a boolean mask and the stems looked up by indexing, instead of
+    redoing the per token work of remove_stopwords() and generate_stem_list() for every occurrence.
+    The stems are interned in the same vocabulary, so the ids of any document decode with it.
+    """
+
+    def __init__(self, stemmer=None, stopwords=None):
+        """
+        stopwords is a set like collection, the StopwordFilter of final_stopwords.txt by default.
+        The multi-word stopwords of a StopwordFilter are dropped too, as its filter() does.
+        """
+        if stopwords is None:
+            stopwords = get_resource('stopword_filter', StopwordFilter)
+        self.stemmer = stemmer if stemmer is not None else Stemmer()
+        self.stopwords = stopwords
+        self._phrases = getattr(stopwords, 'max_phrase_len', 1) > 1
+        self.tokens = []
+        self.index = {}
+        # per id, the arrays double their capacity when the vocabulary outgrows them
+        self._stem_array = np.zeros(1024, dtype=np.int32)
+        self._stop_array = np.zeros(1024, dtype=bool)
+        # whether a multi-word stopword starts with the token
+        self._phrase_array = np.zeros(1024, dtype=bool)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def intern(self, tokens):
+        """
+        Returns the ids of tokens as an int32 array, adding the new word types to the vocabulary
+        """
+        index = self.index
+        tokens = tokens if isinstance(tokens, list) else list(tokens)
+        ids = list(map(index.get, tokens))
+        if None in ids:
+            # the distinct tokens are taken in one pass in C, few of them being new
+            self._add_types([token for token in dict.fromkeys(tokens) if token not in index])
+            ids = list(map(index.__getitem__, tokens))
+        return np.array(ids, dtype=np.int32)
+
+    def _add_types(self, new_tokens):
+        index = self.index
+        tokens = self.tokens
+        start = len(tokens)
+        stems = []
+        while new_tokens:
+            first = len(tokens)
+            index.update(zip(new_tokens, range(first, first + len(new_tokens))))
+            tokens.extend(new_tokens)
+            new_stems = list(map(self.stemmer.stem, new_tokens))
+            stems.extend(new_stems)
+            # the stems may be new types themselves, whose stems are computed in turn
+            new_tokens = [stem for stem in dict.fromkeys(new_stems) if stem not in index]
+        stem_ids = list(map(index.__getitem__, stems))
+        stop_flags = list(map(self.stopwords.__contains__, islice(tokens, start, None)))
+
+        if len(tokens) > len(self._stem_array):
+            capacity = max(2 * len(self._stem_array), len(tokens))
+            self._stem_array = np.resize(self._stem_array, capacity)
+            self._stop_array = np.resize(self._stop_array, capacity)
+            self._phrase_array = np.resize(self._phrase_array, capacity)
+        self._stem_array[start:len(tokens)] = stem_ids
+        self._stop_array[start:len(tokens)] = stop_flags
+        if self._phrases:
+            self._phrase_array[start:len(tokens)] = list(map(self.stopwords.starts_phrase,
+                                                             islice(tokens, start, None)))
+
+    def stem_ids(self):
+        """
+        The id of the stem of each id of the vocabulary
+        """
+        return self._stem_array[:len(self.tokens)]
+
+    def stopword_mask(self):
+        """
+        Whether each id of the vocabulary is a stopword
+        """
+        return self._stop_array[:len(self.tokens)]
+
+    def process(self, tokens, remove_stopwords=True, stem=True):
+        """
+        Returns the ids of tokens, without the stopwords and stemmed, as
+        generate_stem_list(remove_stopwords(tokens)) would
+        """
+        tokens = tokens if isinstance(tokens, list) else list(tokens)
+        ids = self.intern(tokens)
+        if remove_stopwords:
+            ids = ids[self._keep_mask(tokens, ids, [len(tokens)])]
+        return self._apply(ids, stem)
+
+    def process_documents(self, documents, remove_stopwords=True, stem=True):
+        """
+        process() for a list of token lists, interned together and filtered and stemmed as one array
+        """
+        documents = [tokens if isinstance(tokens, list) else list(tokens) for tokens in documents]
+        tokens = list(chain.from_iterable(documents))
+        ids = self.intern(tokens)
+        lengths = np.array(list(map(len, documents)), dtype=np.int64)
+        if remove_stopwords:
+            keep = self._keep_mask(tokens, ids, np.cumsum(lengths))
+            # the documents keep the ids left in their own span
+            doc_ids = np.repeat(np.arange(len(documents)), lengths)
+            lengths = np.bincount(doc_ids[keep], minlength=len(documents))
+            ids = ids[keep]
+        ids = self._apply(ids, stem)
+        # sliced directly, np.split() costs several microseconds per document
+        ends = np.cumsum(lengths).tolist()
+        return [ids[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+    def _keep_mask(self, tokens, ids, ends):
+        """
+        Whether each of the tokens, of ids, is not part of a stopword. ends are the ends of the
+        documents of tokens, which a multi-word stopword doesn't cross.
+        """
+        keep = ~self._stop_array[ids]
+        if not self._phrases:
+            return keep
+        # only the tokens which may start a multi-word stopword are matched, document by document
+        starts = np.flatnonzero(self._phrase_array[ids])
+        # the number of starts before the end of each document
+        bounds = np.searchsorted(starts, ends).tolist()
+        starts = starts.tolist()
+        first = 0
+        for stop, bound in zip(np.asarray(ends).tolist(), bounds):
+            if bound > first:
+                for start, end in self.stopwords.phrase_spans(tokens, starts[first:bound], stop):
+                    keep[start:end] = False
+                first = bound
+        return keep
+
+    def _apply(self, ids, stem):
+        if stem:
+            ids = self._stem_array[ids]
+        return ids
+
+    def decode(self, ids):
+        tokens = self.tokens
+        return [tokens[i] for i in ids]